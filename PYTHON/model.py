@@ -1,8 +1,12 @@
 import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor
@@ -10,285 +14,509 @@ from sklearn.impute import SimpleImputer
 import joblib
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
-# Load Data
+# --- Paths ---
 script_dir = os.path.dirname(os.path.abspath(__file__))
 details_path = os.path.join(script_dir, "MAINDATA.csv")
 ticker_path = os.path.join(script_dir, "PHL_RTP_ticker_info_2007_2025-09-23.csv")
+model_path = os.path.join(script_dir, "orfm4.pkl")
+scaler_path = os.path.join(script_dir, "s4.pkl")
+features_path = os.path.join(script_dir, "features.pkl")  # cached long feature table
+viz_dir = os.path.join(script_dir, "model_evaluation")
+shard_dir = os.path.join(script_dir, "shards")  # per-product / per-category models
 
-# Check if files exist
-if not os.path.exists(details_path):
-    raise FileNotFoundError(f"The file {details_path} does not exist.")
-if not os.path.exists(ticker_path):
-    raise FileNotFoundError(f"The file {ticker_path} does not exist.")
-
-# Load Data
-df_details = pd.read_csv(details_path)
-df_ticker = pd.read_csv(ticker_path)
-
-# Merge ticker info if exists
-if "components" in df_details.columns:
-    df = df_details.merge(
-        df_ticker[["ticker", "full_name", "units"]],
-        how="left",
-        left_on="components",
-        right_on="ticker"
-    )
-else:
-    df = df_details.copy()
-
-# Reshape Wide → Long
 product_cols = [
     "c_beans", "c_cabbage", "c_carrots", "c_eggs",
     "c_meat_beef_chops", "c_meat_chicken_whole", "c_meat_pork",
     "c_onions", "c_potatoes", "c_rice", "c_tomatoes",
-    "c_dish_soap", "c_soap", "c_shampoo", "c_bleach", 
-    "c_detergent", "c_fabric_softeners", "c_toothpaste", "c_deodorant", 
+    "c_dish_soap", "c_soap", "c_shampoo", "c_bleach",
+    "c_detergent", "c_fabric_softeners", "c_toothpaste", "c_deodorant",
     "c_toilet_paper"
 ]
-df_long = df.melt(
-    id_vars=["ISO3", "country", "adm1_name", "adm2_name", "mkt_name", "lat", "lon", "price_date"],
-    value_vars=product_cols,
-    var_name="product",
-    value_name="price"
-)
-
-# Drop missing values
-df_long = df_long.dropna(subset=["price"])
-df_long["price_date"] = pd.to_datetime(df_long["price_date"], errors="coerce")
-df_long = df_long.sort_values("price_date")
-
-# Feature Engineering: Add temporal and lag features
-df_long["year"] = df_long["price_date"].dt.year
-df_long["month"] = df_long["price_date"].dt.month
-df_long["dayofweek"] = df_long["price_date"].dt.dayofweek
-
-# Create lag features
-df_long = df_long.sort_values(["product", "mkt_name", "price_date"])
-df_long["price_lag1"] = df_long.groupby(["product", "mkt_name"])["price"].shift(1)
-df_long["price_lag2"] = df_long.groupby(["product", "mkt_name"])["price"].shift(2)
-df_long["price_lag3"] = df_long.groupby(["product", "mkt_name"])["price"].shift(3)
-df_long["price_lag4"] = df_long.groupby(["product", "mkt_name"])["price"].shift(4)
-df_long["price_lag5"] = df_long.groupby(["product", "mkt_name"])["price"].shift(5)
-df_long["price_lag6"] = df_long.groupby(["product", "mkt_name"])["price"].shift(6)
-df_long["price_lag7"] = df_long.groupby(["product", "mkt_name"])["price"].shift(7)
-df_long["price_lag8"] = df_long.groupby(["product", "mkt_name"])["price"].shift(8)
-df_long["price_lag9"] = df_long.groupby(["product", "mkt_name"])["price"].shift(9)
-df_long["price_lag10"] = df_long.groupby(["product", "mkt_name"])["price"].shift(10)
-df_long["price_lag11"] = df_long.groupby(["product", "mkt_name"])["price"].shift(11)
-df_long["price_lag12"] = df_long.groupby(["product", "mkt_name"])["price"].shift(12)
-
-df_long["price_roll6"] = df_long.groupby(["product", "mkt_name"])["price"].transform(lambda x: x.rolling(6, min_periods=1).mean())
-
-# One-hot encode product
-df_long = pd.get_dummies(df_long, columns=["product"], drop_first=True)
-
-# Drop extra columns
-drop_cols = [
-    "ISO3", "country", "adm1_name", "adm2_name", "mkt_name",
-    "lat", "lon", "price_date"
-]
-df_long = df_long.drop(columns=drop_cols, errors="ignore")
-
-# Impute missing lag values
-imputer = SimpleImputer(strategy="mean")
-df_long[df_long.columns] = imputer.fit_transform(df_long)
-
-# Features & target split
-y = df_long["price"]
-X = df_long.drop(columns=["price"])
-
-# Scale features
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-
-# Train/Test split (chronologically)
-split_idx = int(len(X_scaled) * 0.8)
-X_train, X_test = X_scaled[:split_idx], X_scaled[split_idx:]
-y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
-
-# --- SIMPLIFIED: Use optimized Random Forest without tuning ---
-print("Training Random Forest with optimized parameters...")
-
-# Create and train Random Forest with optimized defaults
-rf_model = RandomForestRegressor(
-    n_estimators=200,          
-    max_depth=20,              
-    min_samples_split=5,        
-    min_samples_leaf=2,         
-    random_state=42,
-    n_jobs=-1
-)
-
-rf_model.fit(X_train, y_train)
-
-# Make predictions
-y_pred = rf_model.predict(X_test)
-
-# --- COMPREHENSIVE EVALUATION ---
-print("\n" + "="*50)
-print("MODEL EVALUATION (No Hyperparameter Tuning)")
-print("="*50)
-
-# Calculate all metrics
-mse = mean_squared_error(y_test, y_pred)
-rmse = np.sqrt(mse)
-mae = mean_absolute_error(y_test, y_pred)
-r2 = r2_score(y_test, y_pred)
-mape = np.mean(np.abs((y_test - y_pred) / y_test)) * 100
-max_error = np.max(np.abs(y_test - y_pred))
-
-# Print metrics
-print(f"Mean Squared Error (MSE): {mse:.4f}")
-print(f"Root Mean Squared Error (RMSE): {rmse:.4f}")
-print(f"Mean Absolute Error (MAE): {mae:.4f}")
-print(f"R-squared (R²): {r2:.4f}")
-print(f"Mean Absolute Percentage Error (MAPE): {mape:.2f}%")
-print(f"Maximum Error: {max_error:.4f}")
-
-# Price distribution context
-avg_price = y_train.mean()
-print(f"\nAverage Price: ${avg_price:.2f}")
-print(f"MAE as % of average price: {(mae/avg_price)*100:.1f}%")
-
-# Interpretation
-if (mae/avg_price)*100 < 10:
-    assessment = "✅ EXCELLENT"
-elif (mae/avg_price)*100 < 20:
-    assessment = "✅ GOOD"
-elif (mae/avg_price)*100 < 30:
-    assessment = "⚠️ ACCEPTABLE"
-else:
-    assessment = "❌ POOR - NEEDS IMPROVEMENT"
-
-print(f"ASSESSMENT: {assessment}")
-
-# Feature Importance (Top 10)
-feature_importance = pd.DataFrame({
-    'feature': X.columns,
-    'importance': rf_model.feature_importances_
-}).sort_values('importance', ascending=False)
-
-print(f"\nTop 10 Most Important Features:")
-print(feature_importance.head(10).to_string(index=False))
-
-# Save the model and scaler
-model_path = os.path.join(script_dir, "orfm4.pkl")
-scaler_path = os.path.join(script_dir, "s4.pkl")
-joblib.dump(rf_model, model_path)
-joblib.dump(scaler, scaler_path)
+# Same grouping as the category pages in app.py
+categories = {
+    "meat": ["c_meat_beef_chops", "c_meat_chicken_whole", "c_meat_pork"],
+    "vegetable": ["c_beans", "c_carrots", "c_cabbage", "c_tomatoes", "c_potatoes"],
+    "cook": ["c_onions", "c_rice", "c_eggs"],
+    "toiletries": ["c_soap", "c_shampoo", "c_toothpaste", "c_deodorant", "c_toilet_paper"],
+    "household": ["c_fabric_softeners", "c_detergent", "c_dish_soap", "c_bleach"],
+}
+id_cols = ["ISO3", "country", "adm1_name", "adm2_name", "mkt_name", "lat", "lon", "price_date"]
+LAGS = 12
+
+
+def to_long(df):
+    """Reshape a wide price table (one c_* column per product) into one row per product and date"""
+    df_long = df.melt(
+        id_vars=id_cols,
+        value_vars=[c for c in product_cols if c in df.columns],
+        var_name="product",
+        value_name="price"
+    )
 
-print("\n" + "="*50)
-print("MODEL SAVED SUCCESSFULLY")
-print("="*50)
-print("Model saved at:", model_path)
-print("Scaler saved at:", scaler_path)
+    # Drop missing values
+    df_long = df_long.dropna(subset=["price"])
+    df_long["price_date"] = pd.to_datetime(df_long["price_date"], errors="coerce")
+    return df_long.sort_values("price_date")
+
+
+def add_features(df_long):
+    """Add temporal, lag and rolling-mean features per product and market"""
+    df_long = df_long.copy()
+    df_long["year"] = df_long["price_date"].dt.year
+    df_long["month"] = df_long["price_date"].dt.month
+    df_long["dayofweek"] = df_long["price_date"].dt.dayofweek
+
+    # Create lag features
+    df_long = df_long.sort_values(["product", "mkt_name", "price_date"])
+    grouped = df_long.groupby(["product", "mkt_name"])["price"]
+    for i in range(1, LAGS + 1):
+        df_long[f"price_lag{i}"] = grouped.shift(i)
+
+    df_long["price_roll6"] = grouped.transform(lambda x: x.rolling(6, min_periods=1).mean())
+    return df_long
+
+
+def to_model_frame(features, columns=None):
+    """One-hot encode product and drop identifier columns.
+
+    With ``columns`` the frame is aligned to an existing feature layout, which
+    is needed when only a few new rows are encoded (get_dummies would otherwise
+    drop a different first product).
+    """
+    if columns is None:
+        out = pd.get_dummies(features, columns=["product"], drop_first=True)
+        return out.drop(columns=id_cols, errors="ignore")
+
+    out = pd.get_dummies(features, columns=["product"])
+    out = out.drop(columns=id_cols, errors="ignore")
+    return out.reindex(columns=list(columns) + ["price"], fill_value=0)
+
+
+def load_details():
+    # Check if files exist
+    if not os.path.exists(details_path):
+        raise FileNotFoundError(f"The file {details_path} does not exist.")
+    if not os.path.exists(ticker_path):
+        raise FileNotFoundError(f"The file {ticker_path} does not exist.")
+
+    # Load Data
+    df_details = pd.read_csv(details_path)
+    df_ticker = pd.read_csv(ticker_path)
+
+    # Merge ticker info if exists
+    if "components" in df_details.columns:
+        return df_details.merge(
+            df_ticker[["ticker", "full_name", "units"]],
+            how="left",
+            left_on="components",
+            right_on="ticker"
+        )
+    return df_details.copy()
+
+
+def save_evaluation(metrics, y_test, y_pred, feature_importance, headless):
+    # Metrics and raw predictions are written as plain files so the plots can be
+    # rendered later (or never) by report.py without retraining.
+    os.makedirs(viz_dir, exist_ok=True)
+
+    with open(os.path.join(viz_dir, "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+    pd.DataFrame({"actual": np.asarray(y_test), "predicted": y_pred}).to_csv(
+        os.path.join(viz_dir, "predictions.csv"), index=False
+    )
+    if feature_importance is not None:
+        feature_importance.to_csv(os.path.join(viz_dir, "feature_importance.csv"), index=False)
 
-# Add this after your model evaluation metrics
+    print("Metrics saved at:", os.path.join(viz_dir, "metrics.json"))
 
-# --- VISUALIZATION OF EVALUATION RESULTS ---
-print("\n" + "="*50)
-print("GENERATING EVALUATION GRAPHS")
-print("="*50)
+    # --- VISUALIZATION OF EVALUATION RESULTS ---
+    # Plots are rendered out of process so training finishes in model-fit time.
+    if headless:
+        print("Headless mode: skipping evaluation graphs (run report.py to render them).")
+    else:
+        subprocess.Popen([sys.executable, os.path.join(script_dir, "report.py"), "--dir", viz_dir])
+        print("Rendering evaluation graphs in the background ->", viz_dir)
 
-# Create visualization directory if it doesn't exist
-viz_dir = os.path.join(script_dir, "model_evaluation")
-os.makedirs(viz_dir, exist_ok=True)
-
-# 1. Actual vs Predicted Scatter Plot
-plt.figure(figsize=(10, 6))
-plt.scatter(y_test, y_pred, alpha=0.6, color='blue')
-plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
-plt.xlabel('Actual Prices')
-plt.ylabel('Predicted Prices')
-plt.title('Actual vs Predicted Prices')
-plt.grid(True, alpha=0.3)
-plt.savefig(os.path.join(viz_dir, 'actual_vs_predicted.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-# 2. Residuals Plot
-residuals = y_test - y_pred
-plt.figure(figsize=(10, 6))
-plt.scatter(y_pred, residuals, alpha=0.6, color='green')
-plt.axhline(y=0, color='r', linestyle='--')
-plt.xlabel('Predicted Prices')
-plt.ylabel('Residuals')
-plt.title('Residuals vs Predicted Prices')
-plt.grid(True, alpha=0.3)
-plt.savefig(os.path.join(viz_dir, 'residuals_plot.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-# 3. Error Distribution
-plt.figure(figsize=(10, 6))
-plt.hist(residuals, bins=50, alpha=0.7, color='orange', edgecolor='black')
-plt.xlabel('Prediction Error')
-plt.ylabel('Frequency')
-plt.title('Distribution of Prediction Errors')
-plt.axvline(x=0, color='r', linestyle='--', label='Zero Error')
-plt.legend()
-plt.grid(True, alpha=0.3)
-plt.savefig(os.path.join(viz_dir, 'error_distribution.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-# 4. Feature Importance Plot (Top 15)
-plt.figure(figsize=(12, 8))
-top_features = feature_importance.head(15)
-plt.barh(top_features['feature'], top_features['importance'], color='skyblue')
-plt.xlabel('Feature Importance')
-plt.title('Top 15 Most Important Features')
-plt.gca().invert_yaxis()
-plt.grid(True, alpha=0.3)
-plt.savefig(os.path.join(viz_dir, 'feature_importance.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-# 5. Metrics Comparison (if you want to compare multiple models)
-metrics = ['MSE', 'RMSE', 'MAE', 'R²']
-values = [mse, rmse, mae, r2]
-
-plt.figure(figsize=(10, 6))
-bars = plt.bar(metrics, values, color=['#ff9999', '#66b3ff', '#99ff99', '#ffcc99'])
-plt.ylabel('Score')
-plt.title('Model Evaluation Metrics')
-plt.ylim(0, max(values) * 1.1)
-
-# Add value labels on bars
-for bar, value in zip(bars, values):
-    plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01, 
-             f'{value:.3f}', ha='center', va='bottom')
-
-plt.grid(True, alpha=0.3)
-plt.savefig(os.path.join(viz_dir, 'metrics_comparison.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-# 6. Price Distribution vs Predictions
-plt.figure(figsize=(12, 6))
-plt.subplot(1, 2, 1)
-plt.hist(y_test, bins=50, alpha=0.7, color='blue', label='Actual', edgecolor='black')
-plt.xlabel('Price')
-plt.ylabel('Frequency')
-plt.title('Actual Price Distribution')
-plt.grid(True, alpha=0.3)
-
-plt.subplot(1, 2, 2)
-plt.hist(y_pred, bins=50, alpha=0.7, color='red', label='Predicted', edgecolor='black')
-plt.xlabel('Price')
-plt.ylabel('Frequency')
-plt.title('Predicted Price Distribution')
-plt.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig(os.path.join(viz_dir, 'price_distributions.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-print("✅ Evaluation graphs saved to:", viz_dir)
-print("   - actual_vs_predicted.png")
-print("   - residuals_plot.png") 
-print("   - error_distribution.png")
-print("   - feature_importance.png")
-print("   - metrics_comparison.png")
-print("   - price_distributions.png")
-
-print("Price context for your model metrics:")
-print(f"Range: ${y_test.min():.0f} - ${y_test.max():.0f}")  # Test data only!
-print(f"Average: ${y_test.mean():.0f}")  # Test data average!
-print(f"Your MAE (${mae:.2f}) is {mae/y.mean()*100:.1f}% of average price")
-print(f"Your RMSE (${rmse:.2f}) is {rmse/y.mean()*100:.1f}% of average price")
\ No newline at end of file
+
+def train_full(args):
+    df = load_details()
+
+    # Reshape Wide → Long, then build features
+    features = add_features(to_long(df))
+
+    # Cache the feature table so incremental updates only build rows for new months
+    features.to_pickle(features_path)
+
+    df_long = to_model_frame(features)
+
+    # Impute missing lag values
+    imputer = SimpleImputer(strategy="mean")
+    df_long[df_long.columns] = imputer.fit_transform(df_long)
+
+    # Features & target split
+    y = df_long["price"]
+    X = df_long.drop(columns=["price"])
+
+    # Scale features
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    # Train/Test split (chronologically)
+    split_idx = int(len(X_scaled) * 0.8)
+    X_train, X_test = X_scaled[:split_idx], X_scaled[split_idx:]
+    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
+
+    # --- SIMPLIFIED: Use optimized Random Forest without tuning ---
+    print("Training Random Forest with optimized parameters...")
+
+    # Create and train Random Forest with optimized defaults
+    rf_model = RandomForestRegressor(
+        n_estimators=200,
+        max_depth=20,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=-1
+    )
+
+    fit_start = time.time()
+    rf_model.fit(X_train, y_train)
+    fit_seconds = time.time() - fit_start
+
+    # Make predictions
+    y_pred = rf_model.predict(X_test)
+
+    # --- COMPREHENSIVE EVALUATION ---
+    print("\n" + "="*50)
+    print("MODEL EVALUATION (No Hyperparameter Tuning)")
+    print("="*50)
+
+    # Calculate all metrics
+    mse = mean_squared_error(y_test, y_pred)
+    rmse = np.sqrt(mse)
+    mae = mean_absolute_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    mape = np.mean(np.abs((y_test - y_pred) / y_test)) * 100
+    max_error = np.max(np.abs(y_test - y_pred))
+
+    # Print metrics
+    print(f"Mean Squared Error (MSE): {mse:.4f}")
+    print(f"Root Mean Squared Error (RMSE): {rmse:.4f}")
+    print(f"Mean Absolute Error (MAE): {mae:.4f}")
+    print(f"R-squared (R²): {r2:.4f}")
+    print(f"Mean Absolute Percentage Error (MAPE): {mape:.2f}%")
+    print(f"Maximum Error: {max_error:.4f}")
+
+    # Price distribution context
+    avg_price = y_train.mean()
+    print(f"\nAverage Price: ${avg_price:.2f}")
+    print(f"MAE as % of average price: {(mae/avg_price)*100:.1f}%")
+
+    # Interpretation
+    if (mae/avg_price)*100 < 10:
+        assessment = "✅ EXCELLENT"
+    elif (mae/avg_price)*100 < 20:
+        assessment = "✅ GOOD"
+    elif (mae/avg_price)*100 < 30:
+        assessment = "⚠️ ACCEPTABLE"
+    else:
+        assessment = "❌ POOR - NEEDS IMPROVEMENT"
+
+    print(f"ASSESSMENT: {assessment}")
+
+    # Feature Importance (Top 10)
+    feature_importance = pd.DataFrame({
+        'feature': X.columns,
+        'importance': rf_model.feature_importances_
+    }).sort_values('importance', ascending=False)
+
+    print(f"\nTop 10 Most Important Features:")
+    print(feature_importance.head(10).to_string(index=False))
+
+    # Save the model and scaler
+    joblib.dump(rf_model, model_path)
+    joblib.dump(scaler, scaler_path)
+
+    # app.py serves shards whenever their index exists, so a full retrain retires them
+    shard_index = os.path.join(shard_dir, "index.json")
+    if os.path.exists(shard_index):
+        os.remove(shard_index)
+        print("Shard index removed; retrain with --sharded to serve shards again.")
+
+    print("\n" + "="*50)
+    print("MODEL SAVED SUCCESSFULLY")
+    print("="*50)
+    print("Model saved at:", model_path)
+    print("Scaler saved at:", scaler_path)
+    print("Feature table cached at:", features_path)
+
+    # --- SAVE EVALUATION RESULTS ---
+    metrics = {
+        "mse": float(mse),
+        "rmse": float(rmse),
+        "mae": float(mae),
+        "r2": float(r2),
+        "mape": float(mape),
+        "max_error": float(max_error),
+        "avg_price": float(avg_price),
+        "assessment": assessment,
+        "n_train": int(len(y_train)),
+        "n_test": int(len(y_test)),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    save_evaluation(metrics, y_test, y_pred, feature_importance, args.headless)
+
+    print("Price context for your model metrics:")
+    print(f"Range: ${y_test.min():.0f} - ${y_test.max():.0f}")  # Test data only!
+    print(f"Average: ${y_test.mean():.0f}")  # Test data average!
+    print(f"Your MAE (${mae:.2f}) is {mae/y.mean()*100:.1f}% of average price")
+    print(f"Your RMSE (${rmse:.2f}) is {rmse/y.mean()*100:.1f}% of average price")
+
+
+def append_features(new_csv):
+    """Build feature rows for the months in ``new_csv`` on top of the cached table.
+
+    Only the last LAGS rows of each product/market history are needed as context
+    for the lags, so the full history is never re-featurized.
+    Returns (full feature table, newly added rows). Nothing is written: the
+    caller saves the table to features_path once the model update succeeded,
+    so a failed update leaves the new months to be learned on the next run.
+    """
+    if not os.path.exists(features_path):
+        raise FileNotFoundError(
+            f"No cached feature table at {features_path}. Run a full training first."
+        )
+
+    cached = pd.read_pickle(features_path)
+    new_long = to_long(pd.read_csv(new_csv))
+
+    # Skip months that are already in the cache
+    key = ["product", "mkt_name", "price_date"]
+    seen = cached.set_index(key).index
+    new_long = new_long[~new_long.set_index(key).index.isin(seen)].copy()
+    if new_long.empty:
+        return cached, new_long
+
+    raw_cols = list(new_long.columns)
+    context = cached.sort_values("price_date").groupby(["product", "mkt_name"]).tail(LAGS)[raw_cols].copy()
+    context["_new"] = False
+    new_long["_new"] = True
+
+    rebuilt = add_features(pd.concat([context, new_long], ignore_index=True))
+    added = rebuilt[rebuilt["_new"]].drop(columns="_new")
+
+    features = pd.concat([cached, added], ignore_index=True)
+    return features, added
+
+
+def train_incremental(args):
+    features, added = append_features(args.incremental)
+    print(f"Built {len(added)} new feature rows")
+    if added.empty:
+        print("Nothing new to learn from; model left unchanged.")
+        return
+
+    rf_model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    columns = scaler.feature_names_in_
+
+    # Recent training window across all products
+    cutoff = features["price_date"].max() - pd.DateOffset(months=args.window)
+    recent = to_model_frame(features[features["price_date"] > cutoff], columns)
+    # Fill missing lags with the history means, as the full imputer would
+    recent = recent.fillna(to_model_frame(features, columns).mean())
+
+    X_recent = scaler.transform(recent.drop(columns=["price"]))
+    y_recent = recent["price"]
+
+    # Out-of-sample check on the new rows before the model sees them
+    new_frame = to_model_frame(added, columns).fillna(recent.mean())
+    y_new = new_frame["price"]
+    y_before = rf_model.predict(scaler.transform(new_frame.drop(columns=["price"])))
+    mae_before = mean_absolute_error(y_new, y_before)
+
+    # warm_start keeps the existing trees and only fits the extra ones
+    print(f"Adding {args.add_trees} trees fitted on the last {args.window} months "
+          f"({len(y_recent)} rows)...")
+    rf_model.set_params(warm_start=True, n_estimators=rf_model.n_estimators + args.add_trees)
+    fit_start = time.time()
+    rf_model.fit(X_recent, y_recent)
+    fit_seconds = time.time() - fit_start
+    rf_model.set_params(warm_start=False)
+
+    joblib.dump(rf_model, model_path)
+    print("Model updated at:", model_path)
+
+    # Only now do the new months count as learned
+    features.to_pickle(features_path)
+    print("Feature table cached at:", features_path)
+
+    metrics = {
+        "mode": "incremental",
+        "new_rows": int(len(added)),
+        "window_rows": int(len(y_recent)),
+        "n_estimators": int(rf_model.n_estimators),
+        "mae_new_rows_before_update": float(mae_before),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    os.makedirs(viz_dir, exist_ok=True)
+    with open(os.path.join(viz_dir, "metrics_incremental.json"), "w") as f:
+        json.dump(metrics, f, indent=2)
+    print(f"MAE on new rows before update: {mae_before:.4f}")
+    print(f"Update fit time: {fit_seconds:.2f}s")
+
+
+# --- Sharded training ---
+def shard_groups(mode):
+    """Map shard name -> products it serves"""
+    if mode == "category":
+        return dict(categories)
+    return {product: [product] for product in product_cols}
+
+
+def train_shard(name, products, features):
+    """Fit one small forest on the rows of ``products`` and save it to shards/<name>.pkl.
+
+    Runs in a worker process. The product one-hot uses the serving names
+    (product_beans, ...) that app.py builds, without drop_first so every
+    product in the shard has its own column.
+    """
+    shard = features[features["product"].isin(products)].copy()
+    shard["product"] = shard["product"].str.replace("c_", "", n=1, regex=False)
+    frame = pd.get_dummies(shard, columns=["product"]).drop(columns=id_cols, errors="ignore")
+    if len(products) == 1:
+        frame = frame.drop(columns=[c for c in frame.columns if c.startswith("product_")])
+
+    # Lag columns that are entirely empty (very short histories) fall back to 0
+    frame = frame.fillna(frame.mean()).fillna(0)
+    y = frame["price"]
+    X = frame.drop(columns=["price"])
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    split_idx = int(len(X_scaled) * 0.8)
+    rf_model = RandomForestRegressor(
+        n_estimators=200,
+        max_depth=20,
+        min_samples_split=5,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=1  # parallelism comes from one process per shard
+    )
+
+    fit_start = time.time()
+    rf_model.fit(X_scaled[:split_idx], y.iloc[:split_idx])
+    fit_seconds = time.time() - fit_start
+
+    y_test = y.iloc[split_idx:]
+    mae = mean_absolute_error(y_test, rf_model.predict(X_scaled[split_idx:])) if len(y_test) else None
+
+    # Refit on the full shard history for serving
+    rf_model.fit(X_scaled, y)
+
+    filename = f"{name}.pkl"
+    joblib.dump(
+        {"model": rf_model, "scaler": scaler, "products": list(products)},
+        os.path.join(shard_dir, filename)
+    )
+    return {
+        "shard": name,
+        "file": filename,
+        "products": list(products),
+        "rows": int(len(y)),
+        "mae": None if mae is None else float(mae),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+
+
+def train_shards(features, mode, only=None, workers=None):
+    """Train the shards for ``mode`` in parallel processes and update shards/index.json.
+
+    ``only`` limits training to the shards serving those products, so one
+    category can be retrained without touching the others.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    index_path = os.path.join(shard_dir, "index.json")
+    index = {"mode": mode, "products": {}, "shards": {}}
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            existing = json.load(f)
+        if existing.get("mode") == mode:
+            index = existing
+
+    groups = shard_groups(mode)
+    if only is not None:
+        groups = {name: prods for name, prods in groups.items() if set(prods) & set(only)}
+    if not groups:
+        print("No shards to train.")
+        return index
+
+    print(f"Training {len(groups)} {mode} shard(s) in parallel...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(train_shard, name, prods, features) for name, prods in groups.items()]
+        results = [f.result() for f in futures]
+
+    for result in results:
+        for product in result["products"]:
+            index["products"][product] = result["file"]
+        index["shards"][result["shard"]] = result
+        mae = "n/a" if result["mae"] is None else f"{result['mae']:.4f}"
+        print(f"  {result['shard']:<22} rows={result['rows']:<6} MAE={mae:<10} fit={result['fit_seconds']}s")
+
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=2)
+    print("Shard index saved at:", index_path)
+    return index
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Prilythic price forecasting model.")
+    parser.add_argument(
+        "--headless", action="store_true",
+        help="Fast mode for automated retrains: save metrics as JSON and skip the evaluation plots."
+    )
+    parser.add_argument(
+        "--incremental", metavar="CSV",
+        help="Update the saved model with the new months in CSV instead of retraining from scratch."
+    )
+    parser.add_argument(
+        "--add-trees", type=int, default=20,
+        help="Trees to add per incremental update (default: 20)."
+    )
+    parser.add_argument(
+        "--window", type=int, default=24,
+        help="Months of recent history the added trees are fitted on (default: 24)."
+    )
+    parser.add_argument(
+        "--sharded", choices=["product", "category"],
+        help="Train one model per product or per category instead of one global forest. "
+             "With --incremental, the shards whose products got new data are refit on their "
+             "full history (--add-trees and --window apply to the global model only)."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None,
+        help="Processes used for sharded training (default: one per CPU)."
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sharded and args.incremental:
+        features, added = append_features(args.incremental)
+        print(f"Built {len(added)} new feature rows")
+        if added.empty:
+            print("Nothing new to learn from; shards left unchanged.")
+        else:
+            train_shards(features, args.sharded, only=added["product"].unique(), workers=args.workers)
+            features.to_pickle(features_path)
+    elif args.sharded:
+        features = add_features(to_long(load_details()))
+        features.to_pickle(features_path)
+        train_shards(features, args.sharded, workers=args.workers)
+    elif args.incremental:
+        train_incremental(args)
+    else:
+        train_full(args)
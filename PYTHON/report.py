@@ -0,0 +1,173 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# --- Base paths ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+EVAL_DIR = os.path.join(script_dir, "model_evaluation")
+
+# Files written by model.py after training
+PREDICTIONS_FILE = "predictions.csv"
+IMPORTANCE_FILE = "feature_importance.csv"
+METRICS_FILE = "metrics.json"
+
+
+def _pyplot():
+    # Imported lazily so the training path never pays for matplotlib
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _save(plt, viz_dir, filename):
+    plt.savefig(os.path.join(viz_dir, filename), dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+# --- Individual plots (each runs in its own worker process) ---
+def plot_actual_vs_predicted(viz_dir):
+    plt = _pyplot()
+    preds = pd.read_csv(os.path.join(viz_dir, PREDICTIONS_FILE))
+    y_test, y_pred = preds['actual'], preds['predicted']
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(y_test, y_pred, alpha=0.6, color='blue')
+    plt.plot([y_test.min(), y_test.max()], [y_test.min(), y_test.max()], 'r--', lw=2)
+    plt.xlabel('Actual Prices')
+    plt.ylabel('Predicted Prices')
+    plt.title('Actual vs Predicted Prices')
+    plt.grid(True, alpha=0.3)
+    _save(plt, viz_dir, 'actual_vs_predicted.png')
+    return 'actual_vs_predicted.png'
+
+
+def plot_residuals(viz_dir):
+    plt = _pyplot()
+    preds = pd.read_csv(os.path.join(viz_dir, PREDICTIONS_FILE))
+    residuals = preds['actual'] - preds['predicted']
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(preds['predicted'], residuals, alpha=0.6, color='green')
+    plt.axhline(y=0, color='r', linestyle='--')
+    plt.xlabel('Predicted Prices')
+    plt.ylabel('Residuals')
+    plt.title('Residuals vs Predicted Prices')
+    plt.grid(True, alpha=0.3)
+    _save(plt, viz_dir, 'residuals_plot.png')
+    return 'residuals_plot.png'
+
+
+def plot_error_distribution(viz_dir):
+    plt = _pyplot()
+    preds = pd.read_csv(os.path.join(viz_dir, PREDICTIONS_FILE))
+    residuals = preds['actual'] - preds['predicted']
+
+    plt.figure(figsize=(10, 6))
+    plt.hist(residuals, bins=50, alpha=0.7, color='orange', edgecolor='black')
+    plt.xlabel('Prediction Error')
+    plt.ylabel('Frequency')
+    plt.title('Distribution of Prediction Errors')
+    plt.axvline(x=0, color='r', linestyle='--', label='Zero Error')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    _save(plt, viz_dir, 'error_distribution.png')
+    return 'error_distribution.png'
+
+
+def plot_feature_importance(viz_dir):
+    plt = _pyplot()
+    top_features = pd.read_csv(os.path.join(viz_dir, IMPORTANCE_FILE)).head(15)
+
+    plt.figure(figsize=(12, 8))
+    plt.barh(top_features['feature'], top_features['importance'], color='skyblue')
+    plt.xlabel('Feature Importance')
+    plt.title('Top 15 Most Important Features')
+    plt.gca().invert_yaxis()
+    plt.grid(True, alpha=0.3)
+    _save(plt, viz_dir, 'feature_importance.png')
+    return 'feature_importance.png'
+
+
+def plot_metrics_comparison(viz_dir):
+    plt = _pyplot()
+    with open(os.path.join(viz_dir, METRICS_FILE)) as f:
+        m = json.load(f)
+    metrics = ['MSE', 'RMSE', 'MAE', 'R²']
+    values = [m['mse'], m['rmse'], m['mae'], m['r2']]
+
+    plt.figure(figsize=(10, 6))
+    bars = plt.bar(metrics, values, color=['#ff9999', '#66b3ff', '#99ff99', '#ffcc99'])
+    plt.ylabel('Score')
+    plt.title('Model Evaluation Metrics')
+    plt.ylim(0, max(values) * 1.1)
+
+    # Add value labels on bars
+    for bar, value in zip(bars, values):
+        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01,
+                 f'{value:.3f}', ha='center', va='bottom')
+
+    plt.grid(True, alpha=0.3)
+    _save(plt, viz_dir, 'metrics_comparison.png')
+    return 'metrics_comparison.png'
+
+
+def plot_price_distributions(viz_dir):
+    plt = _pyplot()
+    preds = pd.read_csv(os.path.join(viz_dir, PREDICTIONS_FILE))
+
+    plt.figure(figsize=(12, 6))
+    plt.subplot(1, 2, 1)
+    plt.hist(preds['actual'], bins=50, alpha=0.7, color='blue', label='Actual', edgecolor='black')
+    plt.xlabel('Price')
+    plt.ylabel('Frequency')
+    plt.title('Actual Price Distribution')
+    plt.grid(True, alpha=0.3)
+
+    plt.subplot(1, 2, 2)
+    plt.hist(preds['predicted'], bins=50, alpha=0.7, color='red', label='Predicted', edgecolor='black')
+    plt.xlabel('Price')
+    plt.ylabel('Frequency')
+    plt.title('Predicted Price Distribution')
+    plt.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    _save(plt, viz_dir, 'price_distributions.png')
+    return 'price_distributions.png'
+
+
+PLOTS = [
+    plot_actual_vs_predicted,
+    plot_residuals,
+    plot_error_distribution,
+    plot_feature_importance,
+    plot_metrics_comparison,
+    plot_price_distributions,
+]
+
+
+def generate_report(viz_dir=EVAL_DIR, workers=None):
+    """Render every evaluation plot from the saved predictions, one process per plot"""
+    with ProcessPoolExecutor(max_workers=workers or len(PLOTS)) as pool:
+        futures = [pool.submit(plot, viz_dir) for plot in PLOTS]
+        return [f.result() for f in futures]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render model evaluation plots from saved predictions.")
+    parser.add_argument("--dir", default=EVAL_DIR, help="Directory holding predictions.csv and metrics.json")
+    parser.add_argument("--workers", type=int, default=None, help="Number of plotting processes")
+    args = parser.parse_args()
+
+    print("\n" + "="*50)
+    print("GENERATING EVALUATION GRAPHS")
+    print("="*50)
+
+    saved = generate_report(args.dir, args.workers)
+
+    print("✅ Evaluation graphs saved to:", args.dir)
+    for name in saved:
+        print("   -", name)
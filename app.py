@@ -1,6 +1,14 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash
+from flask import Flask, render_template, jsonify, request, session, redirect, url_for, flash, Response, stream_with_context, send_from_directory
 from flask_cors import CORS
-import os, joblib, sqlite3, hashlib, pandas as pd, numpy as np
+from functools import lru_cache, partial
+from collections import OrderedDict
+from markupsafe import escape
+import threading
+import mimetypes
+import os, json, joblib, sqlite3, hashlib, pandas as pd, numpy as np
+from dataset_cache import DatasetCache, SnapshotChanged, atomic_write_csv, scan_csv
+from validation import validate_upload, summarize
+from rollups import CATEGORIES, LEVELS, init_rollup_tables, refresh_rollups, rollup_version, query_rollups
 
 # --- Base directory (Prilythic root) ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,6 +22,64 @@ CORS(app)
 
 app.secret_key = 'prilythic_secret_2025'  # for session management
 
+# --- Fingerprinted static assets (built by build_assets.py) ---
+ASSET_MANIFEST_PATH = os.path.join(app.static_folder, 'dist', 'manifest.json')
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+def load_asset_manifest():
+    """Source path -> hashed dist path for every built asset whose source is unchanged.
+
+    Entries are checked against a digest of their source, so a file edited
+    after the last build is served from static/ rather than as a stale,
+    year-cached copy. Empty when the assets have not been built.
+    """
+    if not os.path.exists(ASSET_MANIFEST_PATH):
+        return {}
+    with open(ASSET_MANIFEST_PATH) as f:
+        entries = json.load(f)
+
+    manifest = {}
+    for source, entry in entries.items():
+        path = os.path.join(app.static_folder, source)
+        if not isinstance(entry, dict) or not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        if digest == entry.get('source'):
+            manifest[source] = entry['file']
+    return manifest
+
+asset_manifest = load_asset_manifest()
+
+@app.url_defaults
+def hashed_static_url(endpoint, values):
+    """Point url_for('static', filename=...) at the fingerprinted copy when there is one"""
+    # In debug mode edits under static/ must show up without rebuilding
+    if app.debug:
+        return
+    if endpoint == 'static' and values.get('filename') in asset_manifest:
+        values['filename'] = 'dist/' + asset_manifest[values['filename']]
+
+def serve_static(filename):
+    """Static files; hashed dist/ files are precompressed and cached for a year"""
+    if not filename.startswith('dist/'):
+        return app.send_static_file(filename)
+
+    accepted = request.headers.get('Accept-Encoding', '')
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding in accepted and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+            response = send_from_directory(app.static_folder, filename + suffix,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_from_directory(app.static_folder, filename)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
+
+app.view_functions['static'] = serve_static
+
 DB_PATH = os.path.join(BASE_DIR, 'userAcc.db')
 
 def hash_password(password):
@@ -33,6 +99,7 @@ def init_db():
             password TEXT NOT NULL
         )
     ''')
+    init_rollup_tables(conn)
     conn.commit()
     conn.close()
 
@@ -47,6 +114,134 @@ data_path = os.path.join(BASE_DIR, 'data', 'latest.csv')
 model = joblib.load(model_path)
 scaler = joblib.load(scaler_path)
 
+# --- Optional model shards (trained with PYTHON/model.py --sharded) ---
+SHARD_DIR = os.path.join(BASE_DIR, 'PYTHON', 'shards')
+
+def load_shards():
+    """Map each c_* column to the {'model', 'scaler'} shard serving it, if shards exist"""
+    index_path = os.path.join(SHARD_DIR, 'index.json')
+    if not os.path.exists(index_path):
+        return {}
+
+    with open(index_path) as f:
+        index = json.load(f)
+
+    loaded = {}
+    routes = {}
+    for product, filename in index.get('products', {}).items():
+        if filename not in loaded:
+            loaded[filename] = joblib.load(os.path.join(SHARD_DIR, filename))
+        routes[product] = loaded[filename]
+    return routes
+
+shards = load_shards()
+
+def model_version():
+    """Identifies the loaded model files, so cached output from another model is never reused"""
+    paths = [model_path, os.path.join(SHARD_DIR, 'index.json')]
+    return ":".join(str(os.stat(p).st_mtime_ns) if os.path.exists(p) else "-" for p in paths)
+
+MODEL_VERSION = model_version()
+
+def model_for(product):
+    """Return the (model, scaler) pair serving a c_* column, falling back to the global model"""
+    shard = shards.get(product)
+    if shard:
+        return shard['model'], shard['scaler']
+    return model, scaler
+
+def build_feature_matrix(product, price_paths, next_date, feature_names):
+    """Build model inputs for many price paths at once.
+
+    price_paths is (n_paths, n_months) with the most recent month last; every
+    row gets the lag and rolling-mean features for forecasting next_date.
+    """
+    price_paths = np.atleast_2d(np.asarray(price_paths, dtype=float))
+    n_paths, n_months = price_paths.shape
+
+    # --- Lag features ---
+    lags = 12
+    input_data = {
+        'year': np.full(n_paths, next_date.year),
+        'month': np.full(n_paths, next_date.month),
+        'dayofweek': np.zeros(n_paths),
+    }
+    for i in range(1, lags + 1):
+        input_data[f'price_lag{i}'] = price_paths[:, -i] if i <= n_months else np.zeros(n_paths)
+
+    # --- 6-month rolling mean ---
+    input_data['price_roll6'] = price_paths[:, -6:].mean(axis=1) if n_months >= 1 else np.zeros(n_paths)
+
+    # --- One-hot encoding ---
+    clean_product = product.replace("c_", "")
+    for col in feature_names:
+        if col.startswith('product_'):
+            input_data[col] = np.full(n_paths, 1 if col == f'product_{clean_product}' else 0)
+
+    df_input = pd.DataFrame(input_data)
+    return df_input.reindex(columns=feature_names, fill_value=0)
+
+def build_features(product, last_prices, next_date, feature_names):
+    """Build the one-row model input for forecasting the month after last_prices"""
+    return build_feature_matrix(product, [list(last_prices)], next_date, feature_names)
+
+def product_history(df, product):
+    """Monthly history of a c_* column, sorted by date with one row per month (last wins)"""
+    data = df[['price_date', product]].dropna()
+    data['price_date'] = pd.to_datetime(data['price_date'])
+    data = data.sort_values('price_date')
+
+    # Remove duplicate months, keep last
+    data['year_month'] = data['price_date'].dt.to_period('M')
+    return data.drop_duplicates(subset='year_month', keep='last').drop(columns=['year_month'])
+
+# --- Forecast distribution from the forest's individual trees ---
+FORECAST_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+_leaf_tables = {}
+
+def leaf_table(forest):
+    """Stack every tree's node values into one padded (n_trees, max_nodes) array"""
+    key = id(forest)
+    if key not in _leaf_tables:
+        trees = [est.tree_ for est in forest.estimators_]
+        table = np.zeros((len(trees), max(t.node_count for t in trees)))
+        for i, tree in enumerate(trees):
+            table[i, :tree.node_count] = tree.value[:, 0, 0]
+        _leaf_tables[key] = table
+    return _leaf_tables[key]
+
+def tree_predictions(forest, X):
+    """Per-tree predictions, shape (n_samples, n_trees), from a single apply() call"""
+    leaves = forest.apply(X)
+    table = leaf_table(forest)
+    return table[np.arange(table.shape[0]), leaves]
+
+@lru_cache(maxsize=2048)
+def _forecast(product, recent_prices, year, month):
+    product_model, product_scaler = model_for(product)
+    df_input = build_features(product, recent_prices, pd.Timestamp(year, month, 1),
+                              product_scaler.feature_names_in_)
+    per_tree = tree_predictions(product_model, product_scaler.transform(df_input))[0]
+
+    # The forest's point forecast is the mean of its trees
+    quantiles = np.quantile(per_tree, FORECAST_QUANTILES)
+    return {
+        'predicted': float(per_tree.mean()),
+        'lower': float(quantiles[0]),
+        'upper': float(quantiles[-1]),
+        'quantiles': {f'q{int(q * 100):02d}': float(v) for q, v in zip(FORECAST_QUANTILES, quantiles)},
+    }
+
+def forecast_next(product, last_prices, next_date):
+    """Forecast next month's price for a c_* column using its routed model.
+
+    Returns the point forecast together with a 90% interval and quantiles taken
+    from the per-tree predictions of the same pass. Results are cached on the
+    last 12 prices, which are all the features depend on.
+    """
+    recent_prices = tuple(float(p) for p in last_prices[-12:])
+    return _forecast(product, recent_prices, next_date.year, next_date.month)
+
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
 DATA_FOLDER = os.path.join(BASE_DIR, 'data')
 
@@ -54,6 +249,45 @@ DATA_FOLDER = os.path.join(BASE_DIR, 'data')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(DATA_FOLDER, exist_ok=True)
 
+# --- Shared dataset cache (one copy of each CSV for all sessions) ---
+app.config['DATASET_CACHE_MB'] = int(os.environ.get('PRILYTHIC_DATASET_CACHE_MB', 256))
+datasets = DatasetCache(max_bytes=app.config['DATASET_CACHE_MB'] * 1024 * 1024)
+# Each asgi.py pool worker parses its own copies, so its cache gets a separate, smaller cap
+app.config['WORKER_DATASET_CACHE_MB'] = int(os.environ.get('PRILYTHIC_WORKER_DATASET_CACHE_MB', 64))
+
+def data_file_for(loaded_csv):
+    return os.path.join(DATA_FOLDER, loaded_csv) if loaded_csv else data_path
+
+def current_data_file():
+    """Path of the CSV the current session is working with"""
+    return data_file_for(session.get('loaded_csv'))
+
+def file_version(path):
+    return "{}:{}".format(*DatasetCache.version(path))
+
+def ensure_rollups(conn, data_file):
+    """Build the rollups of a dataset if they are missing or older than the file"""
+    dataset = os.path.basename(data_file)
+    if rollup_version(conn, dataset) != file_version(data_file):
+        version, df = datasets.snapshot(data_file)
+        refresh_rollups(conn, dataset, df, "{}:{}".format(*version))
+    return dataset
+
+# --- CPU offloading (asgi.py installs a process pool; the dev server runs jobs inline) ---
+cpu_pool = None
+
+def run_cpu(fn, *args):
+    """Run a CPU-bound job in the worker pool when there is one, inline otherwise"""
+    if cpu_pool is None:
+        return fn(*args)
+    return cpu_pool.submit(fn, *args).result()
+
+def map_cpu(fn, *iterables):
+    """map() over the worker pool when there is one; results come back in order"""
+    if cpu_pool is None:
+        return map(fn, *iterables)
+    return cpu_pool.map(fn, *iterables)
+
 
 @app.route('/', methods=['GET', 'POST'])
 def login_page():
@@ -129,66 +363,13 @@ def dashboard():
     username = session['username']
     selected_products = session.get('selected_products', [])
 
-    products_info = []
-    data_file = os.path.join(DATA_FOLDER, session['loaded_csv']) if session.get('loaded_csv') else data_path
-    df = pd.read_csv(data_file)
-
-    for product in selected_products:
-        clean_product = product.replace("c_", "")
-        if product not in df.columns or df[product].dropna().shape[0] < 1:
-            continue
-
-        data = df[['price_date', product]].dropna()
-        data['price_date'] = pd.to_datetime(data['price_date'])
-        data = data.sort_values('price_date')
-
-        # Remove duplicate months, keep last
-        data['year_month'] = data['price_date'].dt.to_period('M')
-        data = data.drop_duplicates(subset='year_month', keep='last').drop(columns=['year_month'])
-
-        last_prices = data[product].values
-        last_date = data['price_date'].max()
-        next_date = last_date + pd.DateOffset(months=1)
-
-        # --- Lag features ---
-        lags = 12
-        lag_values = [last_prices[-i] if i <= len(last_prices) else 0 for i in range(1, lags + 1)]
-        lag_dict = {f'price_lag{i+1}': [lag_values[i]] for i in range(lags)}
-
-        # --- 6-month rolling mean ---
-        price_roll6 = np.mean(last_prices[-6:]) if len(last_prices) >= 1 else 0
-
-        input_data = {
-            'year': [next_date.year],
-            'month': [next_date.month],
-            'dayofweek': [0],
-            **lag_dict,
-            'price_roll6': [price_roll6]
-        }
-
-        # --- One-hot encoding ---
-        for col in scaler.feature_names_in_:
-            if col.startswith('product_'):
-                input_data[col] = [1 if col == f'product_{clean_product}' else 0]
-
-        df_input = pd.DataFrame(input_data)
-        df_input = df_input.reindex(columns=scaler.feature_names_in_, fill_value=0)
-        df_scaled = scaler.transform(df_input)
-        predicted_price = model.predict(df_scaled)[0]
-
-        hist_data = data.tail(12).copy()
-        hist_data['price_date'] = hist_data['price_date'].dt.strftime('%Y-%m-%d')
-
-        products_info.append({
-            "name": clean_product.replace("_", " ").title(),
-            "historical": hist_data.to_dict(orient='records'),
-            "predicted_price": float(predicted_price),
-            "next_month": f"{next_date.year}-{next_date.month:02d}-01",
-        })
+    products_info = [get_product_info(product) for product in selected_products]
+    return render_dashboard(products_info, selected_products, username)
 
+def render_dashboard(products_info, selected_products, username):
     return render_template(
         'Dashboard.html',
-        products_info=products_info,
+        products_info=[info for info in products_info if info],
         selected_products=[p.replace("c_", "").replace("_", " ").title() for p in selected_products], 
         username=username
     )
@@ -199,7 +380,7 @@ def product_select():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    df = pd.read_csv(data_path)
+    df = datasets.get(data_path)
     product_columns = [col for col in df.columns if col.startswith("c_")]
     products_map = {col.replace("c_", "").replace("_", " ").title(): col for col in product_columns}
 
@@ -259,50 +440,50 @@ def settings():
     csv_files = [f for f in os.listdir(DATA_FOLDER) if f.endswith('.csv')]
     return render_template('Settings.html', csv_files=csv_files)
 
-def get_product_info(product_column):
-    """Helper function to get product info for a specific column"""
-    data_file = os.path.join(DATA_FOLDER, session['loaded_csv']) if session.get('loaded_csv') else data_path
-    df = pd.read_csv(data_file)
-
+# --- Fragment and page caches ---
+# Product cards depend only on (dataset, dataset version, model version, product),
+# so they are shared by every user; only the username differs between pages.
+PAGE_CACHE_SIZE = 128
+USERNAME_SLOT = '__PRILYTHIC_USERNAME__'
+_fragments = OrderedDict()
+_pages = OrderedDict()
+_cache_lock = threading.Lock()
+page_cache_stats = {'fragment_hits': 0, 'fragment_misses': 0, 'page_hits': 0, 'page_misses': 0}
+
+def _cache_get(cache, key, stat):
+    with _cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            page_cache_stats[f'{stat}_hits'] += 1
+            return True, cache[key]
+        page_cache_stats[f'{stat}_misses'] += 1
+        return False, None
+
+def _cache_put(cache, key, value):
+    with _cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > PAGE_CACHE_SIZE:
+            cache.popitem(last=False)
+
+def dataset_key(data_file=None):
+    data_file = data_file or current_data_file()
+    return (data_file, file_version(data_file), MODEL_VERSION)
+
+def build_product_info(df, product_column):
     if product_column not in df.columns or df[product_column].dropna().shape[0] < 1:
         return None
 
-    data = df[['price_date', product_column]].dropna()
-    data['price_date'] = pd.to_datetime(data['price_date'])
-    data = data.sort_values('price_date')
-
-    # Remove duplicate months, keep last
-    data['year_month'] = data['price_date'].dt.to_period('M')
-    data = data.drop_duplicates(subset='year_month', keep='last').drop(columns=['year_month'])
+    data = product_history(df, product_column)
 
     last_prices = data[product_column].values
     last_date = data['price_date'].max()
     next_date = last_date + pd.DateOffset(months=1)
 
-    # --- Prediction logic (same as your existing code) ---
-    lags = 12
-    lag_values = [last_prices[-i] if i <= len(last_prices) else 0 for i in range(1, lags + 1)]
-    lag_dict = {f'price_lag{i+1}': [lag_values[i]] for i in range(lags)}
-
-    price_roll6 = np.mean(last_prices[-6:]) if len(last_prices) >= 1 else 0
-
-    input_data = {
-        'year': [next_date.year],
-        'month': [next_date.month],
-        'dayofweek': [0],
-        **lag_dict,
-        'price_roll6': [price_roll6]
-    }
+    # --- Prediction logic ---
+    forecast = forecast_next(product_column, last_prices, next_date)
 
     clean_product = product_column.replace("c_", "")
-    for col in scaler.feature_names_in_:
-        if col.startswith('product_'):
-            input_data[col] = [1 if col == f'product_{clean_product}' else 0]
-
-    df_input = pd.DataFrame(input_data)
-    df_input = df_input.reindex(columns=scaler.feature_names_in_, fill_value=0)
-    df_scaled = scaler.transform(df_input)
-    predicted_price = model.predict(df_scaled)[0]
 
     hist_data = data.tail(12).copy()
     hist_data['price_date'] = hist_data['price_date'].dt.strftime('%Y-%m-%d')
@@ -310,10 +491,84 @@ def get_product_info(product_column):
     return {
         "name": clean_product.replace("_", " ").title(),
         "historical": hist_data.to_dict(orient='records'),
-        "predicted_price": float(predicted_price),
+        "predicted_price": forecast['predicted'],
+        "prediction_interval": {"lower": forecast['lower'], "upper": forecast['upper']},
         "next_month": f"{next_date.year}-{next_date.month:02d}-01"
     }
 
+def product_info(data_file, product_column):
+    return build_product_info(datasets.get(data_file), product_column)
+
+def cached_product_info(data_file, product_column):
+    """(found, info) for a product card from the fragment cache"""
+    return _cache_get(_fragments, dataset_key(data_file) + (product_column,), 'fragment')
+
+def store_product_info(data_file, product_column, info):
+    _cache_put(_fragments, dataset_key(data_file) + (product_column,), info)
+
+def get_product_info(product_column):
+    """Helper function to get product info for a specific column"""
+    data_file = current_data_file()
+    found, info = cached_product_info(data_file, product_column)
+    if not found:
+        info = run_cpu(product_info, data_file, product_column)
+        store_product_info(data_file, product_column, info)
+    return info
+
+# Category pages: route -> (template, {template variable: c_* column})
+CATEGORY_PAGES = {
+    'meat': ('meat.html', {
+        'beef_info': 'c_meat_beef_chops',
+        'chicken_info': 'c_meat_chicken_whole',
+        'pork_info': 'c_meat_pork',
+    }),
+    'vegetable': ('vegetable.html', {
+        'beans_info': 'c_beans',
+        'carrots_info': 'c_carrots',
+        'cabbage_info': 'c_cabbage',
+        'tomatoes_info': 'c_tomatoes',
+        'potatoes_info': 'c_potatoes',
+    }),
+    'cook': ('cook.html', {
+        'onions_info': 'c_onions',
+        'rice_info': 'c_rice',
+        'eggs_info': 'c_eggs',
+    }),
+    'toiletries': ('toiletries.html', {
+        'soap_info': 'c_soap',
+        'shampoo_info': 'c_shampoo',
+        'toothpaste_info': 'c_toothpaste',
+        'deodorant_info': 'c_deodorant',
+        'toiletpaper_info': 'c_toilet_paper',
+    }),
+    'household': ('household.html', {
+        'fabricsoftener_info': 'c_fabric_softeners',
+        'detergent_info': 'c_detergent',
+        'dishsoap_info': 'c_dish_soap',
+        'bleach_info': 'c_bleach',
+    }),
+}
+
+def cached_page(data_file, template):
+    return _cache_get(_pages, dataset_key(data_file) + (template,), 'page')
+
+def store_page(data_file, template, html):
+    _cache_put(_pages, dataset_key(data_file) + (template,), html)
+
+def fill_username(html, username):
+    return html.replace(USERNAME_SLOT, str(escape(username)))
+
+def render_product_page(category):
+    """Render a category page from cache, injecting the username afterwards"""
+    template, product_columns = CATEGORY_PAGES[category]
+    data_file = current_data_file()
+    found, html = cached_page(data_file, template)
+    if not found:
+        infos = {name: get_product_info(column) for name, column in product_columns.items()}
+        html = render_template(template, username=USERNAME_SLOT, **infos)
+        store_page(data_file, template, html)
+    return fill_username(html, session['username'])
+
 # --- Preferences Route ---
 @app.route('/preferences')
 def preferences():
@@ -326,16 +581,7 @@ def meat():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    username = session['username']
-    # Get data for all meat products
-    beef_info = get_product_info('c_meat_beef_chops')
-    chicken_info = get_product_info('c_meat_chicken_whole') 
-    pork_info = get_product_info('c_meat_pork')
-
-    return render_template('meat.html', 
-                         beef_info=beef_info,
-                         chicken_info=chicken_info,
-                         pork_info=pork_info, username=username)
+    return render_product_page('meat')
 
 # --- Vegetable Category Page ---
 @app.route('/vegetable')
@@ -343,21 +589,7 @@ def vegetable():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    username = session['username']
-    # Get data for all vegetable products
-    beans_info = get_product_info('c_beans')
-    carrots_info = get_product_info('c_carrots')
-    cabbage_info = get_product_info('c_cabbage')
-    tomatoes_info = get_product_info('c_tomatoes')
-    potatoes_info = get_product_info('c_potatoes')
-
-    return render_template('vegetable.html', 
-                         beans_info=beans_info,
-                         carrots_info=carrots_info,
-                         cabbage_info=cabbage_info,
-                         tomatoes_info=tomatoes_info,
-                         potatoes_info=potatoes_info, username=username)
-
+    return render_product_page('vegetable')
 
 # --- Cooking Essentials Category Page ---
 @app.route('/cook')
@@ -365,16 +597,7 @@ def cook():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    username = session['username']
-    # Get data for all cooking essential products
-    onions_info = get_product_info('c_onions')
-    rice_info = get_product_info('c_rice')
-    eggs_info = get_product_info('c_eggs')
-
-    return render_template('cook.html', 
-                         onions_info=onions_info,
-                         rice_info=rice_info,
-                         eggs_info=eggs_info, username=username)
+    return render_product_page('cook')
 
 # --- Toiletries Category Page ---
 @app.route('/toiletries')
@@ -382,20 +605,7 @@ def toiletries():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    username = session['username']
-    # Get data for all toiletries products
-    soap_info = get_product_info('c_soap')
-    shampoo_info = get_product_info('c_shampoo')
-    toothpaste_info = get_product_info('c_toothpaste')
-    deodorant_info = get_product_info('c_deodorant')
-    toiletpaper_info = get_product_info('c_toilet_paper')
-
-    return render_template('toiletries.html', 
-                         soap_info=soap_info,
-                         shampoo_info=shampoo_info,
-                         toothpaste_info=toothpaste_info,
-                         deodorant_info=deodorant_info,
-                         toiletpaper_info=toiletpaper_info, username=username)
+    return render_product_page('toiletries')
 
 # --- Household Category Page ---
 @app.route('/household')
@@ -403,19 +613,7 @@ def household():
     if 'username' not in session:
         return redirect(url_for('login_page'))
 
-    username = session['username']
-    # Get data for all household products
-    fabricsoftener_info = get_product_info('c_fabric_softeners')
-    detergent_info = get_product_info('c_detergent')
-    dishsoap_info = get_product_info('c_dish_soap')
-    bleach_info = get_product_info('c_bleach')
-
-    return render_template('household.html', 
-                         fabricsoftener_info=fabricsoftener_info,
-                         detergent_info=detergent_info,
-                         dishsoap_info=dishsoap_info,
-                         bleach_info=bleach_info, username=username)
-
+    return render_product_page('household')
 
 # --- Logout Route ---
 @app.route('/logout')
@@ -424,61 +622,227 @@ def logout():
     return redirect(url_for('login_page'))
 
 # --- Prediction API Route ---
-@app.route('/predict/<product>', methods=['GET'])
-def predict(product):
-    
-    data_file = os.path.join(DATA_FOLDER, session['loaded_csv']) if session.get('loaded_csv') else data_path
-    df = pd.read_csv(data_file)
+def predict_payload(data_file, product):
+    """JSON body and status of /predict/<product>; runs in a worker process under asgi.py"""
+    df = datasets.get(data_file)
 
     if product not in df.columns:
-        return jsonify({'error': f'Product "{product}" not found in dataset.'}), 400
+        return {'error': f'Product "{product}" not found in dataset.'}, 400
 
     data = df[['price_date', product]].dropna()
     data['price_date'] = pd.to_datetime(data['price_date'])
     data = data.sort_values('price_date')
 
     if data.shape[0] < 1:
-        return jsonify({'error': f'Not enough data for "{product}"'}), 400
+        return {'error': f'Not enough data for "{product}"'}, 400
 
     last_prices = data[product].values
     last_date = data['price_date'].max()
     next_date = last_date + pd.DateOffset(months=1)
 
-    # --- Lag features ---
-    lags = 12
-    lag_values = [last_prices[-i] if i <= len(last_prices) else 0 for i in range(1, lags + 1)]
-    lag_dict = {f'price_lag{i+1}': [lag_values[i]] for i in range(lags)}
-
-    # --- 6-month rolling mean ---
-    price_roll6 = np.mean(last_prices[-6:]) if len(last_prices) >= 1 else 0
-
-    input_data = {
-        'year': [next_date.year],
-        'month': [next_date.month],
-        'dayofweek': [0],
-        **lag_dict,
-        'price_roll6': [price_roll6]
-    }
-
-    clean_product = product.replace("c_", "")
-    for col in scaler.feature_names_in_:
-        if col.startswith('product_'):
-            input_data[col] = [1 if col == f'product_{clean_product}' else 0]
-
-    df_input = pd.DataFrame(input_data)
-    df_input = df_input.reindex(columns=scaler.feature_names_in_, fill_value=0)
-    df_scaled = scaler.transform(df_input)
-    predicted_price = model.predict(df_scaled)[0]
+    forecast = forecast_next(product, last_prices, next_date)
 
     hist_data = data.tail(12).copy()
     hist_data['price_date'] = hist_data['price_date'].dt.strftime('%Y-%m-%d')
 
-    return jsonify({
+    return {
         'product': product,
         'historical': hist_data.to_dict(orient='records'),
-        'predicted_next_month': round(float(predicted_price), 2),
+        'predicted_next_month': round(forecast['predicted'], 2),
+        'prediction_interval': {
+            'lower': round(forecast['lower'], 2),
+            'upper': round(forecast['upper'], 2),
+        },
+        'quantiles': {k: round(v, 2) for k, v in forecast['quantiles'].items()},
         'next_month': f"{next_date.year}-{next_date.month:02d}-01"
-    })
+    }, 200
+
+@app.route('/predict/<product>', methods=['GET'])
+def predict(product):
+    body, status = run_cpu(predict_payload, current_data_file(), product)
+    return jsonify(body), status
+
+# --- What-if simulation ---
+SIMULATION_MAX_PATHS = 20000
+SIMULATION_MAX_HORIZON = 24
+SIMULATION_BATCH = 1000  # paths per vectorized batch; one progress message per batch
+
+def simulate_paths(histories, start_dates, shocks, horizon, n_paths, rng, volatility=0.0):
+    """Run n_paths Monte-Carlo price paths per product through the lag-feature + model pipeline.
+
+    The shock for a product scales its last observed price before the first
+    step. At every step each path follows one randomly drawn tree of the
+    forest, so the spread of the paths reflects the model's own uncertainty;
+    volatility adds optional log-normal noise on top. Returns
+    {product: array of shape (n_paths, horizon)}.
+    """
+    results = {}
+    for product, prices in histories.items():
+        product_model, product_scaler = model_for(product)
+        feature_names = product_scaler.feature_names_in_
+
+        paths = np.tile(np.asarray(prices[-12:], dtype=float), (n_paths, 1))
+        if paths.shape[1]:
+            paths[:, -1] *= 1 + shocks.get(product, 0.0)
+
+        simulated = np.empty((n_paths, horizon))
+        rows = np.arange(n_paths)
+        next_date = start_dates[product]
+        for step in range(horizon):
+            X = product_scaler.transform(build_feature_matrix(product, paths, next_date, feature_names))
+            per_tree = tree_predictions(product_model, X)
+            next_prices = per_tree[rows, rng.integers(per_tree.shape[1], size=n_paths)]
+            if volatility:
+                next_prices = next_prices * np.exp(rng.normal(0.0, volatility, n_paths))
+
+            simulated[:, step] = next_prices
+            paths = np.hstack([paths, next_prices[:, None]])[:, -12:]
+            next_date = next_date + pd.DateOffset(months=1)
+        results[product] = simulated
+    return results
+
+def simulate_batch(histories, start_dates, shocks, horizon, volatility, n_paths, seed):
+    """One batch of simulate_paths with its own random stream; runs in a worker process under asgi.py"""
+    return simulate_paths(histories, start_dates, shocks, horizon, n_paths, np.random.default_rng(seed), volatility)
+
+def summarize_paths(simulated):
+    """Per-month mean and 5/50/95 percentile bands of an (n_paths, horizon) array"""
+    p05, p50, p95 = np.percentile(simulated, [5, 50, 95], axis=0)
+    return {
+        'mean': np.round(simulated.mean(axis=0), 2).tolist(),
+        'p05': np.round(p05, 2).tolist(),
+        'p50': np.round(p50, 2).tolist(),
+        'p95': np.round(p95, 2).tolist(),
+    }
+
+@app.route('/simulate', methods=['POST'])
+def simulate():
+    """Stream Monte-Carlo what-if scenarios as newline-delimited JSON.
+
+    Body: {"products": [...], "shocks": {"c_rice": 0.1}, "appended": {"c_rice": [..]},
+           "horizon": 6, "paths": 2000, "volatility": 0.0, "seed": null}
+    "appended" holds already-simulated months to continue from. One line is
+    sent per batch of paths with the bands so far; the last has "complete": true.
+    """
+    if 'username' not in session:
+        return jsonify({'error': 'Not logged in.'}), 401
+
+    params = request.get_json(silent=True) or {}
+    products = params.get('products') or session.get('selected_products', [])
+    if not isinstance(products, list) or not all(isinstance(p, str) for p in products):
+        return jsonify({'error': 'products must be a list of columns.'}), 400
+    try:
+        horizon = int(params.get('horizon', 6))
+        n_paths = int(params.get('paths', 2000))
+        volatility = float(params.get('volatility', 0.0))
+        seed = params.get('seed')
+        seed = None if seed is None else int(seed)
+        shocks = {p: float(v) for p, v in (params.get('shocks') or {}).items()}
+        appended = {p: [float(x) for x in v] for p, v in (params.get('appended') or {}).items()}
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Invalid simulation parameters.'}), 400
+
+    if not 1 <= horizon <= SIMULATION_MAX_HORIZON:
+        return jsonify({'error': f'horizon must be between 1 and {SIMULATION_MAX_HORIZON}.'}), 400
+    if not 1 <= n_paths <= SIMULATION_MAX_PATHS:
+        return jsonify({'error': f'paths must be between 1 and {SIMULATION_MAX_PATHS}.'}), 400
+    if volatility < 0:
+        return jsonify({'error': 'volatility must not be negative.'}), 400
+    unknown = (set(shocks) | set(appended)) - set(products)
+    if unknown:
+        return jsonify({'error': f'shocks/appended name products not being simulated: {", ".join(sorted(unknown))}.'}), 400
+    if any(shock <= -1 for shock in shocks.values()):
+        return jsonify({'error': 'shocks must be greater than -1 (a -100% shock leaves no price).'}), 400
+    if any(price <= 0 for prices in appended.values() for price in prices):
+        return jsonify({'error': 'appended prices must be positive.'}), 400
+
+    df = datasets.get(current_data_file())
+
+    histories, start_dates, months = {}, {}, {}
+    for product in products:
+        if product not in df.columns:
+            return jsonify({'error': f'Product "{product}" not found in dataset.'}), 400
+        data = product_history(df, product)
+        if data.empty:
+            return jsonify({'error': f'Not enough data for "{product}"'}), 400
+
+        extra = appended.get(product, [])
+        histories[product] = list(data[product].values) + extra
+        start = data['price_date'].max() + pd.DateOffset(months=len(extra) + 1)
+        start_dates[product] = start
+        months[product] = [
+            (start + pd.DateOffset(months=i)).strftime('%Y-%m-01') for i in range(horizon)
+        ]
+
+    # Independent, reproducible random streams so batches can run in parallel
+    sizes = [min(SIMULATION_BATCH, n_paths - start) for start in range(0, n_paths, SIMULATION_BATCH)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    run_batch = partial(simulate_batch, histories, start_dates, shocks, horizon, volatility)
+
+    def generate():
+        batches = {product: [] for product in histories}
+        done = 0
+        for size, result in zip(sizes, map_cpu(run_batch, sizes, seeds)):
+            for product, simulated in result.items():
+                batches[product].append(simulated)
+            done += size
+
+            yield json.dumps({
+                'paths_done': done,
+                'paths_total': n_paths,
+                'complete': done >= n_paths,
+                'products': {
+                    product: {'months': months[product], **summarize_paths(np.vstack(parts))}
+                    for product, parts in batches.items()
+                },
+            }) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def merge_upload(filepath, latest_csv):
+    """Validate an uploaded CSV and merge it into latest.csv; returns the validation report.
+
+    CPU-bound, so it runs in a worker process under asgi.py. The caller holds
+    datasets.write_lock(latest_csv).
+    """
+    # Read the new month's data
+    new_data = pd.read_csv(filepath)
+    old_data = datasets.get(latest_csv) if os.path.exists(latest_csv) else None
+
+    # Validate before anything touches latest.csv
+    new_data, report = validate_upload(new_data, old_data)
+    with open(filepath + '.validation.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    if report['schema_errors'] or report['accepted'] == 0:
+        return report
+
+    # Rollups can be patched in place only if they match the file being replaced
+    conn = get_db_connection()
+    rollups_current = (
+        os.path.exists(latest_csv)
+        and rollup_version(conn, 'latest.csv') == file_version(latest_csv)
+    )
+    conn.close()
+
+    if old_data is not None:
+        # Merge, keeping latest entries if duplicates by price_date
+        combined = pd.concat([old_data, new_data], ignore_index=True)
+        combined = combined.drop_duplicates(subset='price_date', keep='last')
+    else:
+        # If first import, this becomes the base data
+        combined = new_data
+
+    # Write to a temp file and swap it in, so latest.csv is never half-written
+    atomic_write_csv(combined, latest_csv)
+
+    # Refresh only the months/quarters/years the new file touches
+    months = new_data['price_date'] if rollups_current else None
+    conn = get_db_connection()
+    try:
+        refresh_rollups(conn, 'latest.csv', combined, file_version(latest_csv), months)
+    finally:
+        conn.close()
+    return report
 
 @app.route('/import_csv', methods=['POST'])
 def import_csv():
@@ -493,33 +857,24 @@ def import_csv():
 
     if file and file.filename.endswith('.csv'):
         filepath = os.path.join(UPLOAD_FOLDER, file.filename)
-        file.save(filepath)
 
         try:
-            # Read the new month's data
-            new_data = pd.read_csv(filepath)
-
-            # Ensure correct folder paths
             latest_csv = os.path.join(DATA_FOLDER, "latest.csv")
 
-            if os.path.exists(latest_csv):
-                # Read existing combined data
-                old_data = pd.read_csv(latest_csv)
-
-                # Merge, keeping latest entries if duplicates by price_date
-                combined = pd.concat([old_data, new_data], ignore_index=True)
-                combined = combined.drop_duplicates(subset='price_date', keep='last')
-            else:
-                # If first import, this becomes the base data
-                combined = new_data
+            # One import at a time (the saved upload included, so two uploads with
+            # the same name cannot overwrite each other); readers keep their snapshot
+            with datasets.write_lock(latest_csv):
+                file.save(filepath)
+                report = run_cpu(merge_upload, filepath, latest_csv)
 
-            # Save the updated combined CSV
-            combined.to_csv(latest_csv, index=False)
+            if report['schema_errors'] or report['accepted'] == 0:
+                flash(f"CSV not imported. {summarize(report)}", "danger")
+                return redirect(url_for('settings'))
 
             # Automatically load the new latest.csv into the dashboard
             session['loaded_csv'] = 'latest.csv'
 
-            flash("New data appended successfully to latest.csv!", "success")
+            flash(f"New data appended successfully to latest.csv! {summarize(report)}", "success")
             return redirect(url_for('dashboard'))
 
         except Exception as e:
@@ -538,8 +893,9 @@ def load_csv(filename):
         return redirect(url_for('settings'))
 
     try:
-        df = pd.read_csv(file_path)
-        if df.empty:
+        # Header and row-count scan only; the data is parsed on first use
+        columns, rows = scan_csv(file_path)
+        if not columns or rows == 0:
             flash(f"The file '{filename}' is empty.", "warning")
             return redirect(url_for('settings'))
 
@@ -552,6 +908,117 @@ def load_csv(filename):
         flash(f"Error loading file: {str(e)}", "danger")
         return redirect(url_for('settings'))
 
+# --- Rollup Analytics API ---
+def rollups_payload(data_file, level, product=None, category=None):
+    """JSON body and status of /api/rollups"""
+    if level not in LEVELS:
+        return {'error': f'level must be one of {", ".join(LEVELS)}.'}, 400
+    if category and category not in CATEGORIES:
+        return {'error': f'Unknown category "{category}".'}, 400
+
+    conn = get_db_connection()
+    try:
+        dataset = ensure_rollups(conn, data_file)
+        if product:
+            rows = query_rollups(conn, dataset, level, [product])
+        elif category:
+            rows = query_rollups(conn, dataset, level, CATEGORIES[category])
+        else:
+            rows = query_rollups(conn, dataset, level, by_product=True)
+    finally:
+        conn.close()
+
+    return {
+        'dataset': dataset,
+        'level': level,
+        'product': product,
+        'category': category,
+        'rows': rows,
+    }, 200
+
+@app.route('/api/rollups')
+def api_rollups():
+    """Precomputed monthly/quarterly/yearly aggregates for a product, a category or all products"""
+    # Can trigger a full rollup rebuild, so not open to anonymous callers
+    if 'username' not in session:
+        return jsonify({'error': 'Not logged in.'}), 401
+
+    body, status = rollups_payload(
+        current_data_file(),
+        request.args.get('level', 'month'),
+        request.args.get('product'),
+        request.args.get('category'),
+    )
+    return jsonify(body), status
+
+# --- CSV Preview ---
+PREVIEW_FOLDERS = {'data': DATA_FOLDER, 'uploads': UPLOAD_FOLDER}
+PREVIEW_PAGE_SIZE = 50
+PREVIEW_MAX_PAGE_SIZE = 500
+
+@app.route('/preview/<folder>/<filename>')
+def preview_csv(folder, filename):
+    """Show one page of a CSV from data/ or uploads/, read through its row-offset index"""
+    if 'username' not in session:
+        return redirect(url_for('login_page'))
+
+    base = PREVIEW_FOLDERS.get(folder)
+    if base is None or filename != os.path.basename(filename) or not filename.endswith('.csv'):
+        flash("Invalid file.", "danger")
+        return redirect(url_for('settings'))
+
+    file_path = os.path.join(base, filename)
+    if not os.path.exists(file_path):
+        flash(f"File '{filename}' not found.", "danger")
+        return redirect(url_for('settings'))
+
+    per_page = request.args.get('per_page', PREVIEW_PAGE_SIZE, type=int)
+    per_page = min(max(per_page, 1), PREVIEW_MAX_PAGE_SIZE)
+    columns = request.args.get('columns', '')
+    selected_columns = [c for c in columns.split(',') if c] or None
+
+    try:
+        for attempt in range(2):
+            index = datasets.row_index(file_path)
+            total_pages = max(1, -(-index.total_rows // per_page))
+            page = min(max(request.args.get('page', 1, type=int), 1), total_pages)
+            try:
+                page_df = index.read((page - 1) * per_page, per_page, selected_columns)
+                break
+            except SnapshotChanged:
+                # Replaced by an import between indexing and reading; index the new file once
+                if attempt:
+                    raise
+    except Exception as e:
+        flash(f"Error previewing file: {e}", "danger")
+        return redirect(url_for('settings'))
+
+    return render_template(
+        'csv_view.html',
+        folder=folder,
+        filename=filename,
+        table_preview=page_df.to_html(classes='table table-sm table-striped', index=False),
+        total_rows=index.total_rows,
+        total_columns=len(index.columns),
+        page=page,
+        total_pages=total_pages,
+        per_page=per_page,
+        columns=columns
+    )
+
+@app.route('/dataset_cache/stats')
+def dataset_cache_stats():
+    if 'username' not in session:
+        return jsonify({'error': 'Not logged in.'}), 401
+    stats = {**datasets.stats(), 'pages': dict(page_cache_stats)}
+    if cpu_pool is not None:
+        # Worker caches live in other processes and are not included in the figures above
+        stats['pool_workers'] = {
+            'count': app.config['CPU_WORKERS'],
+            'max_bytes_each': app.config['WORKER_DATASET_CACHE_MB'] * 1024 * 1024,
+        }
+    return jsonify(stats)
+
 @app.route('/delete_account', methods=['POST'])
 def delete_account():
     if 'username' not in session:
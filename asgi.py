@@ -0,0 +1,212 @@
+"""Production entry point: Prilythic under an ASGI server.
+
+    pip install uvicorn a2wsgi
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+The dashboard, the category pages and the forecast and rollup JSON
+endpoints are answered natively on the event loop. Product forecasts run
+concurrently in a bounded process pool, SQLite work and template rendering
+are awaited in threads, so one server process can hold many concurrent
+dashboard connections.
+
+Every other route (login, settings, /simulate, /import_csv, ...) is passed to
+the Flask app on PRILYTHIC_WSGI_THREADS threads, so at most that many of
+those requests are in progress at once. Their CPU work goes through the same
+pool via app.run_cpu. For /simulate each thread is a long-lived stream, and
+imports are serialised by the dataset write lock anyway, so the thread cap
+is not what limits them. Compare against the dev server with loadtest.py.
+
+Every pool worker keeps its own dataset cache, capped at
+PRILYTHIC_WORKER_DATASET_CACHE_MB (default 64) rather than the server's
+PRILYTHIC_DATASET_CACHE_MB. /dataset_cache/stats covers the server process
+only and lists the worker count and cap.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from flask import render_template
+from itsdangerous import BadSignature
+from werkzeug.test import EnvironBuilder
+
+import app as prilythic
+
+flask_app = prilythic.app
+
+CPU_WORKERS = int(os.environ.get('PRILYTHIC_CPU_WORKERS', os.cpu_count() or 2))
+WSGI_THREADS = int(os.environ.get('PRILYTHIC_WSGI_THREADS', 16))
+
+wsgi = WSGIMiddleware(flask_app, workers=WSGI_THREADS)
+pool = None
+
+
+def _init_worker():
+    # Workers run jobs inline; only the server process dispatches to the pool
+    prilythic.cpu_pool = None
+    # Keeps dataset memory bounded at DATASET_CACHE_MB + CPU_WORKERS * WORKER_DATASET_CACHE_MB
+    prilythic.datasets.max_bytes = flask_app.config['WORKER_DATASET_CACHE_MB'] * 1024 * 1024
+
+
+def session_data(scope):
+    """Flask's signed session cookie, decoded without a Flask request context"""
+    cookies = SimpleCookie()
+    for name, value in scope['headers']:
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+
+    morsel = cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if morsel is None or serializer is None:
+        return {}
+    try:
+        return serializer.loads(morsel.value, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return {}
+
+
+async def send_json(send, body, status=200):
+    payload = json.dumps(body).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode()),
+            (b'access-control-allow-origin', b'*'),  # as flask_cors does for the Flask routes
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def send_html(send, html):
+    payload = html.encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/html; charset=utf-8'),
+            (b'content-length', str(len(payload)).encode()),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+def in_request_context(scope, fn, *args, **kwargs):
+    """Call a rendering function inside a Flask request context built from the ASGI scope"""
+    # url_for in the templates needs one; the session is not used
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    environ = EnvironBuilder(path=scope['path'], headers=headers).get_environ()
+    with flask_app.request_context(environ):
+        return fn(*args, **kwargs)
+
+
+async def product_infos(data_file, columns):
+    """Product cards from the fragment cache; misses are forecast concurrently in the pool"""
+    infos = {}
+    for column in columns:
+        found, info = prilythic.cached_product_info(data_file, column)
+        if found:
+            infos[column] = info
+
+    missing = [column for column in columns if column not in infos]
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(pool, prilythic.product_info, data_file, column) for column in missing
+    ))
+    for column, info in zip(missing, results):
+        prilythic.store_product_info(data_file, column, info)
+        infos[column] = info
+    return [infos[column] for column in columns]
+
+
+async def dashboard(scope, send, session):
+    data_file = prilythic.data_file_for(session.get('loaded_csv'))
+    selected = session['selected_products']
+    infos = await product_infos(data_file, selected)
+    html = await asyncio.to_thread(
+        in_request_context, scope, prilythic.render_dashboard, infos, selected, session['username']
+    )
+    await send_html(send, html)
+
+
+async def category_page(scope, send, session, category):
+    data_file = prilythic.data_file_for(session.get('loaded_csv'))
+    template, product_columns = prilythic.CATEGORY_PAGES[category]
+    found, html = prilythic.cached_page(data_file, template)
+    if not found:
+        infos = await product_infos(data_file, list(product_columns.values()))
+        context = dict(zip(product_columns, infos))
+        html = await asyncio.to_thread(
+            in_request_context, scope, render_template, template, username=prilythic.USERNAME_SLOT, **context
+        )
+        prilythic.store_page(data_file, template, html)
+    await send_html(send, prilythic.fill_username(html, session['username']))
+
+
+async def predict(scope, send, product):
+    data_file = prilythic.data_file_for(session_data(scope).get('loaded_csv'))
+    loop = asyncio.get_running_loop()
+    body, status = await loop.run_in_executor(pool, prilythic.predict_payload, data_file, product)
+    await send_json(send, body, status)
+
+
+async def rollups(scope, send):
+    session = session_data(scope)
+    if 'username' not in session:
+        return await send_json(send, {'error': 'Not logged in.'}, 401)
+
+    data_file = prilythic.data_file_for(session.get('loaded_csv'))
+    args = {k: v[0] for k, v in parse_qs(scope['query_string'].decode('latin-1')).items()}
+    body, status = await asyncio.to_thread(
+        prilythic.rollups_payload, data_file, args.get('level', 'month'), args.get('product'), args.get('category')
+    )
+    await send_json(send, body, status)
+
+
+async def lifespan(receive, send):
+    global pool
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Spawned, not forked: the server process already runs threads holding cache locks
+            pool = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+            prilythic.cpu_pool = pool
+            flask_app.config['CPU_WORKERS'] = CPU_WORKERS
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            prilythic.cpu_pool = None
+            pool.shutdown(cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        path = scope['path']
+        product = path[len('/predict/'):]
+        if path.startswith('/predict/') and product and '/' not in product:
+            return await predict(scope, send, product)
+        if path == '/api/rollups':
+            return await rollups(scope, send)
+
+        # Logged-in page loads; redirects (no session, no products yet) stay with Flask
+        session = session_data(scope)
+        if 'username' in session:
+            if path == '/dashboard' and session.get('selected_products'):
+                return await dashboard(scope, send, session)
+            if path.lstrip('/') in prilythic.CATEGORY_PAGES:
+                return await category_page(scope, send, session, path.lstrip('/'))
+
+    await wsgi(scope, receive, send)
@@ -0,0 +1,127 @@
+"""Build fingerprinted, minified and precompressed copies of static/ into static/dist/.
+
+Run after changing anything in static/:
+
+    python build_assets.py
+
+app.py picks up static/dist/manifest.json on startup, rewrites
+url_for('static', filename=...) to the hashed files and serves them with
+immutable cache headers. Optional packages are used when installed:
+rcssmin / rjsmin for minification, brotli for .br files and Pillow for PNG
+optimisation; without them the files are still fingerprinted and gzipped.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+SOURCE_DIRS = ['CSS', 'JS', 'IMAGES']
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json')
+MIN_COMPRESS_BYTES = 512
+
+
+def minify_css(text):
+    try:
+        import rcssmin
+        return rcssmin.cssmin(text)
+    except ImportError:
+        # Comments, whitespace runs and spaces around braces/separators
+        text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+        text = re.sub(r'\s+', ' ', text)
+        return re.sub(r'\s*([{};,>])\s*', r'\1', text).strip()
+
+
+def minify_js(text):
+    try:
+        import rjsmin
+        return rjsmin.jsmin(text)
+    except ImportError:
+        # Without a real tokenizer only trailing whitespace and blank lines are safe to drop
+        lines = (line.rstrip() for line in text.splitlines())
+        return '\n'.join(line for line in lines if line) + '\n'
+
+
+def optimize_png(data):
+    try:
+        from PIL import Image
+    except ImportError:
+        return data
+    out = io.BytesIO()
+    Image.open(io.BytesIO(data)).save(out, format='PNG', optimize=True)
+    return out.getvalue() if out.tell() < len(data) else data
+
+
+def source_digest(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def build_file(rel_path):
+    """Write the processed, fingerprinted copy of static/<rel_path>; returns its manifest entry"""
+    with open(os.path.join(STATIC_DIR, rel_path), 'rb') as f:
+        data = f.read()
+    source = source_digest(data)
+
+    ext = os.path.splitext(rel_path)[1].lower()
+    if ext == '.css':
+        data = minify_css(data.decode('utf-8')).encode('utf-8')
+    elif ext == '.js':
+        data = minify_js(data.decode('utf-8')).encode('utf-8')
+    elif ext == '.png':
+        data = optimize_png(data)
+
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    stem, _ = os.path.splitext(rel_path)
+    hashed = f'{stem}.{digest}{ext}'
+    out_path = os.path.join(DIST_DIR, hashed)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    with open(out_path, 'wb') as f:
+        f.write(data)
+
+    # Precompressed variants, served when the browser accepts them
+    if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+        with open(out_path + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        try:
+            import brotli
+            with open(out_path + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+        except ImportError:
+            pass
+    # The source digest lets app.py skip entries whose source changed after the build
+    return {'file': hashed.replace(os.sep, '/'), 'source': source}
+
+
+def build():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR)
+
+    manifest = {}
+    for source in SOURCE_DIRS:
+        for root, _, files in os.walk(os.path.join(STATIC_DIR, source)):
+            for name in sorted(files):
+                if name.startswith('.'):
+                    continue
+                rel_path = os.path.relpath(os.path.join(root, name), STATIC_DIR).replace(os.sep, '/')
+                manifest[rel_path] = build_file(rel_path)
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+if __name__ == '__main__':
+    manifest = build()
+    before = sum(os.path.getsize(os.path.join(STATIC_DIR, p)) for p in manifest)
+    after = sum(os.path.getsize(os.path.join(DIST_DIR, e['file'])) for e in manifest.values())
+    print(f"Built {len(manifest)} assets into {DIST_DIR}")
+    print(f"Size: {before / 1024:.1f} KB -> {after / 1024:.1f} KB (before gzip/brotli)")
+    print("Manifest saved at:", MANIFEST_PATH)
@@ -0,0 +1,270 @@
+import io
+import os
+import stat
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are still serialised within the process
+    fcntl = None
+
+# Fixed rather than derived from the umask: os.umask() is process-wide and not thread-safe
+NEW_FILE_MODE = 0o644
+REPLACE_RETRIES = 20  # Windows refuses os.replace while a reader has the file open
+
+
+class SnapshotChanged(RuntimeError):
+    """The file was replaced after the snapshot it belongs to was taken"""
+
+
+def handle_version(f):
+    """(mtime_ns, size) of an open file, i.e. of the exact bytes that will be read from it"""
+    st = os.fstat(f.fileno())
+    return st.st_mtime_ns, st.st_size
+
+
+def _fsync_dir(directory):
+    # Persist the rename itself; directories cannot be opened for fsync on Windows
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _file_mode(path):
+    """Permission bits of path, or NEW_FILE_MODE for a file that does not exist yet"""
+    if os.path.exists(path):
+        return stat.S_IMODE(os.stat(path).st_mode)
+    return NEW_FILE_MODE
+
+
+def atomic_write_csv(df, path):
+    """Replace path with df as CSV; readers see the old file or the new one, never a partial write"""
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the permissions readers already rely on
+        os.chmod(tmp_path, _file_mode(path))
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp_path, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.05)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+def scan_csv(path, chunk_size=1 << 20):
+    """Cheap validation scan: header columns and data row count without parsing the file"""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        rows = 0
+        last = header[-1:]
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            rows += chunk.count(b'\n')
+            last = chunk[-1:]
+        # Count a final row that has no trailing newline
+        if last and last != b'\n' and f.tell() > len(header):
+            rows += 1
+
+    columns = header.decode('utf-8-sig').strip().split(',') if header.strip() else []
+    return columns, rows
+
+
+class RowIndex:
+    """Byte offsets of every data row in a CSV, so any page can be read without a full parse"""
+
+    def __init__(self, path, chunk_size=1 << 20):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.version = handle_version(f)
+            self.header = f.readline()
+            starts = [np.array([len(self.header)], dtype=np.int64)]
+            pos = len(self.header)
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 10)
+                starts.append(newlines.astype(np.int64) + pos + 1)
+                pos += len(chunk)
+
+        # offsets[i]:offsets[i + 1] is the byte range of row i
+        offsets = np.concatenate(starts)
+        if offsets[-1] != pos:
+            offsets = np.append(offsets, pos)
+        self.offsets = offsets
+        self.columns = self.header.decode('utf-8-sig').strip().split(',') if self.header.strip() else []
+
+    @property
+    def total_rows(self):
+        return len(self.offsets) - 1
+
+    def read(self, start, count, columns=None):
+        """Parse rows [start, start + count), optionally keeping only some columns.
+
+        Raises SnapshotChanged if the file was replaced since it was indexed.
+        """
+        start = max(0, min(start, self.total_rows))
+        stop = max(start, min(start + count, self.total_rows))
+        with open(self.path, 'rb') as f:
+            if handle_version(f) != self.version:
+                raise SnapshotChanged(self.path)
+            f.seek(self.offsets[start])
+            body = f.read(int(self.offsets[stop] - self.offsets[start]))
+
+        usecols = [c for c in columns if c in self.columns] if columns else None
+        if not body.strip():
+            return pd.DataFrame(columns=usecols or self.columns)
+        return pd.read_csv(io.BytesIO(self.header + body), usecols=usecols)
+
+
+class DatasetCache:
+    """Process-wide LRU cache of parsed CSV files shared by every session.
+
+    Entries are keyed on the file path and invalidated when the file's
+    modification time or size changes. Least recently used frames are evicted
+    once their combined in-memory size exceeds max_bytes. Cached frames are
+    shared, so callers must not modify them in place.
+
+    Files are expected to be replaced whole (atomic_write_csv under
+    write_lock), so a frame parsed from an open handle is a consistent
+    snapshot of one version even if the file is swapped mid-request.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (version, frame, nbytes)
+        self._indexes = OrderedDict()  # path -> (version, RowIndex)
+        self.max_indexes = 32
+        self._writers = {}  # path -> threading.Lock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def version(path):
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        return self.snapshot(path)[1]
+
+    def snapshot(self, path):
+        """(version, frame) of path, both taken from the same open handle"""
+        path = os.path.abspath(path)
+        with open(path, 'rb') as f:
+            version = handle_version(f)
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry and entry[0] == version:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return version, entry[1]
+                self.misses += 1
+
+            df = pd.read_csv(f)
+        nbytes = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            entry = self._entries.get(path)
+            # A slow reader of an older version must not replace a newer entry
+            if not entry or entry[0][0] <= version[0]:
+                self._entries[path] = (version, df, nbytes)
+                self._entries.move_to_end(path)
+                self._evict()
+        return version, df
+
+    @contextmanager
+    def write_lock(self, path):
+        """Serialise read-modify-write cycles on path (across processes too where flock exists)"""
+        path = os.path.abspath(path)
+        with self._lock:
+            lock = self._writers.setdefault(path, threading.Lock())
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            with open(path + '.lock', 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def row_index(self, path):
+        """Row-offset index for path, built once per file version"""
+        path = os.path.abspath(path)
+        version = self.version(path)
+
+        with self._lock:
+            entry = self._indexes.get(path)
+            if entry and entry[0] == version:
+                self._indexes.move_to_end(path)
+                return entry[1]
+
+        index = RowIndex(path)
+        with self._lock:
+            self._indexes[path] = (index.version, index)
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the cap
+        while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @property
+    def nbytes(self):
+        return sum(entry[2] for entry in self._entries.values())
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._indexes.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+                self._indexes.pop(os.path.abspath(path), None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'files': [os.path.basename(p) for p in self._entries],
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,132 @@
+"""Compare the threaded dev server with the ASGI serving mode under concurrent load.
+
+Start both servers, then point the load test at each:
+
+    python app.py                                   # dev server on :5000
+    uvicorn asgi:application --port 8000            # ASGI mode on :8000
+    python loadtest.py --login USER:PASSWORD --url http://127.0.0.1:5000 --url http://127.0.0.1:8000
+
+The account must already have selected its products. Each client thread
+keeps one connection open and cycles through --path until --duration is
+over; any response other than 200 counts as an error. Throughput and
+latency percentiles are printed per server.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+DEFAULT_PATHS = [
+    '/dashboard',
+    '/meat',
+    '/vegetable',
+    '/predict/c_rice',
+    '/predict/c_eggs',
+    '/predict/c_beans',
+    '/api/rollups?level=quarter&category=cook',
+]
+
+
+def login(url, credentials):
+    """Session cookie header for USER:PASSWORD, or {} without credentials"""
+    if not credentials:
+        return {}
+    username, password = credentials.split(':', 1)
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    conn.request('POST', '/', urlencode({'username': username, 'password': password}),
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    cookie = response.getheader('Set-Cookie')
+    if response.status != 302 or not cookie:
+        raise SystemExit(f"Login to {url} failed (HTTP {response.status})")
+    return {'Cookie': cookie.split(';', 1)[0]}
+
+
+def client(url, paths, deadline, latencies, errors, headers):
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(path)
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+            continue
+        if response.status != 200:
+            errors.append(path)
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run(url, paths, concurrency, duration, credentials=None):
+    """Load one server; returns a dict of throughput and latency figures"""
+    headers = login(url, credentials)
+
+    # Warm caches and worker processes so both servers are measured in steady state
+    parts = urlsplit(url)
+    for path in paths:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=120)
+        conn.request('GET', path, headers=headers)
+        conn.getresponse().read()
+        conn.close()
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=client, args=(url, paths, deadline, latencies, errors, headers))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50': float(np.percentile(ms, 50)) if ms.size else float('nan'),
+        'p95': float(np.percentile(ms, 95)) if ms.size else float('nan'),
+        'p99': float(np.percentile(ms, 99)) if ms.size else float('nan'),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load-test one or more running Prilythic servers.")
+    parser.add_argument("--url", action="append", required=True, help="Server base URL (repeat to compare)")
+    parser.add_argument("--path", action="append", help="Request path to cycle through (repeatable)")
+    parser.add_argument("--login", metavar="USER:PASSWORD", help="Log in first; the pages and rollups need a session")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent client connections")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per server")
+    args = parser.parse_args()
+
+    paths = args.path or DEFAULT_PATHS
+    print("\n" + "="*50)
+    print(f"LOAD TEST: {args.concurrency} connections, {args.duration:.0f}s per server")
+    print("="*50)
+
+    results = {}
+    for url in args.url:
+        print(f"Running against {url} ...")
+        results[url] = run(url, paths, args.concurrency, args.duration, args.login)
+
+    print(f"\n{'server':<28}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for url, r in results.items():
+        print(f"{url:<28}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.1f}"
+              f"{r['p50']:>10.1f}{r['p95']:>10.1f}{r['p99']:>10.1f}")
@@ -0,0 +1,176 @@
+import pandas as pd
+
+# Same grouping as the category pages
+CATEGORIES = {
+    'meat': ['c_meat_beef_chops', 'c_meat_chicken_whole', 'c_meat_pork'],
+    'vegetable': ['c_beans', 'c_carrots', 'c_cabbage', 'c_tomatoes', 'c_potatoes'],
+    'cook': ['c_onions', 'c_rice', 'c_eggs'],
+    'toiletries': ['c_soap', 'c_shampoo', 'c_toothpaste', 'c_deodorant', 'c_toilet_paper'],
+    'household': ['c_fabric_softeners', 'c_detergent', 'c_dish_soap', 'c_bleach'],
+}
+
+LEVELS = {
+    'month': lambda d: d.dt.strftime('%Y-%m'),
+    'quarter': lambda d: d.dt.year.astype(str) + 'Q' + d.dt.quarter.astype(str),
+    'year': lambda d: d.dt.year.astype(str),
+}
+
+# Additive sums and counts, so any set of products or periods can be combined later
+SUM_COLUMNS = [
+    'n_close', 'sum_close', 'n_range', 'sum_range',
+    'n_inflation', 'sum_inflation', 'sum_trust', 'sum_trust_close',
+]
+
+
+def init_rollup_tables(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rollups (
+            dataset TEXT NOT NULL,
+            level TEXT NOT NULL,
+            period TEXT NOT NULL,
+            product TEXT NOT NULL,
+            n_close INTEGER, sum_close REAL,
+            n_range INTEGER, sum_range REAL,
+            n_inflation INTEGER, sum_inflation REAL,
+            sum_trust REAL, sum_trust_close REAL,
+            PRIMARY KEY (dataset, level, period, product)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rollup_versions (
+            dataset TEXT PRIMARY KEY,
+            version TEXT NOT NULL
+        )
+    ''')
+
+
+def _monthly_rows(df):
+    """One row per product and month (last row of a month wins, as on the dashboard)"""
+    dates = pd.to_datetime(df['price_date'], errors='coerce')
+    frames = []
+    for close_col in [c for c in df.columns if c.startswith('c_')]:
+        name = close_col[2:]
+
+        def column(prefix):
+            col = f'{prefix}{name}'
+            if col in df.columns:
+                return pd.to_numeric(df[col], errors='coerce')
+            return pd.Series(float('nan'), index=df.index)
+
+        frames.append(pd.DataFrame({
+            'product': close_col,
+            'price_date': dates,
+            'close': pd.to_numeric(df[close_col], errors='coerce'),
+            'range': column('h_') - column('l_'),
+            'inflation': column('inflation_'),
+            'trust': column('trust_'),
+        }))
+
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['product', 'price_date', 'close', 'range', 'inflation', 'trust'])
+    rows = rows.dropna(subset=['price_date', 'close']).sort_values('price_date')
+    rows['year_month'] = rows['price_date'].dt.to_period('M')
+    return rows.drop_duplicates(subset=['product', 'year_month'], keep='last')
+
+
+def touched_periods(months):
+    """Period keys per level that a set of dates falls in"""
+    dates = pd.Series(pd.to_datetime(list(months), errors='coerce')).dropna()
+    return {level: set(key(dates)) for level, key in LEVELS.items()}
+
+
+def compute_rollups(df, months=None):
+    """Rollup rows for every level, optionally only for the periods touching ``months``"""
+    touched = touched_periods(months) if months is not None else None
+    if touched is not None:
+        # A year is the widest period and last-row-wins only looks within a month,
+        # so rows from untouched years can be dropped before melting
+        years = {int(y) for y in touched['year']}
+        df = df[pd.to_datetime(df['price_date'], errors='coerce').dt.year.isin(years)]
+
+    rows = _monthly_rows(df)
+    trusted = rows['trust'].notna()
+    rows = rows.assign(
+        has_range=rows['range'].notna(),
+        has_inflation=rows['inflation'].notna(),
+        trust_w=rows['trust'].where(trusted, 0.0),
+        trust_close=(rows['trust'] * rows['close']).where(trusted, 0.0),
+    )
+
+    out = []
+    for level, key in LEVELS.items():
+        level_rows = rows.assign(period=key(rows['price_date']))
+        if touched is not None:
+            level_rows = level_rows[level_rows['period'].isin(touched[level])]
+
+        grouped = level_rows.groupby(['period', 'product'])
+        agg = pd.DataFrame({
+            'n_close': grouped['close'].count(),
+            'sum_close': grouped['close'].sum(),
+            'n_range': grouped['has_range'].sum(),
+            'sum_range': grouped['range'].sum(),
+            'n_inflation': grouped['has_inflation'].sum(),
+            'sum_inflation': grouped['inflation'].sum(),
+            'sum_trust': grouped['trust_w'].sum(),
+            'sum_trust_close': grouped['trust_close'].sum(),
+        }).reset_index()
+        agg.insert(0, 'level', level)
+        out.append(agg)
+    return pd.concat(out, ignore_index=True)
+
+
+def refresh_rollups(conn, dataset, df, version, months=None):
+    """Rebuild the rollups of ``dataset``; with ``months`` only the periods they fall in"""
+    table = compute_rollups(df, months)
+
+    if months is None:
+        conn.execute("DELETE FROM rollups WHERE dataset = ?", (dataset,))
+    else:
+        for level, periods in touched_periods(months).items():
+            conn.executemany(
+                "DELETE FROM rollups WHERE dataset = ? AND level = ? AND period = ?",
+                [(dataset, level, period) for period in periods]
+            )
+
+    conn.executemany(
+        f"INSERT INTO rollups (dataset, level, period, product, {', '.join(SUM_COLUMNS)}) "
+        f"VALUES (?, ?, ?, ?, {', '.join('?' * len(SUM_COLUMNS))})",
+        [
+            (dataset, r.level, r.period, r.product, *(float(getattr(r, c)) for c in SUM_COLUMNS))
+            for r in table.itertuples(index=False)
+        ]
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO rollup_versions (dataset, version) VALUES (?, ?)",
+        (dataset, version)
+    )
+    conn.commit()
+
+
+def rollup_version(conn, dataset):
+    row = conn.execute("SELECT version FROM rollup_versions WHERE dataset = ?", (dataset,)).fetchone()
+    return row[0] if row else None
+
+
+def query_rollups(conn, dataset, level, products=None, by_product=False):
+    """Aggregates per period for the given products combined (or per product with by_product)"""
+    group = "period, product" if by_product else "period"
+    sql = f'''
+        SELECT {group},
+               SUM(n_close) AS months,
+               SUM(sum_close) / SUM(n_close) AS mean_close,
+               SUM(sum_range) / NULLIF(SUM(n_range), 0) AS mean_range,
+               SUM(sum_inflation) / NULLIF(SUM(n_inflation), 0) AS mean_inflation,
+               SUM(sum_trust_close) / NULLIF(SUM(sum_trust), 0) AS trust_weighted_close
+        FROM rollups
+        WHERE dataset = ? AND level = ?
+    '''
+    params = [dataset, level]
+    if products:
+        sql += f" AND product IN ({', '.join('?' * len(products))})"
+        params += list(products)
+    sql += f" GROUP BY {group} ORDER BY {group}"
+
+    cursor = conn.execute(sql, params)
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
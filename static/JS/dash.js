@@ -1,4 +1,4 @@
-window.simulateProduct = function(productId) {
+window.simulateProduct = async function(productId) {
     console.log(`=== STARTING SIMULATION FOR: ${productId} ===`);
     
     // Get the CURRENT PREDICTED PRICE (what's already displayed)
@@ -31,12 +31,20 @@ window.simulateProduct = function(productId) {
     // ADD THE CURRENT PREDICTED PRICE TO HISTORICAL DATA
     addToHistoricalData(productId, currentPredictedPrice, simulationDateStr);
     
-    // GENERATE A NEW PREDICTION for next month
-    const newPrediction = generateNewPrediction(productId, currentPredictedPrice);
+    // GENERATE A NEW PREDICTION for next month through the server model
+    const newPrediction = await generateNewPrediction(productId, currentPredictedPrice);
     console.log(`🎯 New prediction for next month: ${newPrediction}`);
     
-    // Update displayed prediction with the NEW prediction
-    predictedElement.textContent = newPrediction.toFixed(2);
+    showSimulatedPrediction(productId, newPrediction);
+    console.log(`✅ Simulation complete for ${productId}`);
+};
+
+// Update a product card with a new simulated prediction
+function showSimulatedPrediction(productId, newPrediction) {
+    const predictedElement = document.getElementById(`predicted-${productId}`);
+    if (predictedElement) {
+        predictedElement.textContent = newPrediction.toFixed(2);
+    }
     
     // Update next month display
     const nextMonthElement = document.getElementById(`next-month-${productId}`);
@@ -46,6 +54,13 @@ window.simulateProduct = function(productId) {
         console.log(`📅 Updated month to: ${newMonth}`);
     }
     
+    // Update the 90% band shown under the prediction
+    const interval = window[`interval_${productId}`];
+    const intervalElement = document.getElementById(`interval-${productId}`);
+    if (interval && intervalElement) {
+        intervalElement.textContent = `90% range: ${interval.lower.toFixed(2)} – ${interval.upper.toFixed(2)}`;
+    }
+    
     // Update the global predicted value
     window[`predicted_${productId}`] = newPrediction;
     
@@ -55,9 +70,7 @@ window.simulateProduct = function(productId) {
         console.log(`🔄 Updating chart with ${currentMonths} months view`);
         updateChart(productId, currentMonths);
     }
-    
-    console.log(`✅ Simulation complete for ${productId}`);
-};
+}
 
 // Get the currently selected time range for a product
 function getCurrentTimeRange(productId) {
@@ -84,52 +97,94 @@ function getCurrentTimeRange(productId) {
     return 12;
 }
 
-function generateNewPrediction(productId, currentPrice) {
-    console.log(`🔮 Generating prediction for: ${productId} from ${currentPrice}`);
-    
-    // Get historical data for this product
+// Dataset column for a product card id, e.g. "Meat_Beef_Chops" -> "c_meat_beef_chops"
+function productColumn(productId) {
+    return 'c_' + productId.toLowerCase();
+}
+
+// Prices the user has already simulated for a product, oldest first
+function simulatedPrices(productId) {
     const historicalData = window[`historical_${productId}`] || [];
+    const simulated = historicalData.filter(entry => entry.simulated);
+    if (simulated.length === 0) return [];
     
-    // Calculate volatility dynamically from historical data
-    const volatility = calculateVolatility(historicalData, productId);
-    
-    // Generate realistic price movement
-    const randomChange = (Math.random() - 0.5) * 2 * volatility;
-    const newPrice = currentPrice * (1 + randomChange);
-    
-    // Ensure reasonable minimum price
-    const finalPrice = Math.max(newPrice, currentPrice * 0.3);
-    
-    console.log(`🔮 Prediction details - Volatility: ${volatility.toFixed(4)}, Change: ${(randomChange * 100).toFixed(1)}%, New Price: ${finalPrice.toFixed(2)}`);
-    
-    return parseFloat(finalPrice.toFixed(2));
+    const priceField = detectPriceField(simulated[0], productId);
+    return simulated.map(entry => parseFloat(entry[priceField])).filter(p => !isNaN(p));
 }
 
-// Calculate volatility from historical data
-function calculateVolatility(historicalData, productId = '') {
-    if (!historicalData || historicalData.length < 2) return 0.1;
-    
-    // Extract prices using field detection
-    const priceField = detectPriceField(historicalData[0], productId);
-    const prices = historicalData.map(entry => entry[priceField]).filter(p => p !== undefined && p !== null);
+// Run a what-if simulation on the server and read its streamed progress.
+// onProgress receives every partial summary; the final summary is returned.
+async function streamSimulation(request, onProgress = null) {
+    const response = await fetch('/simulate', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(request)
+    });
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({}));
+        throw new Error(error.error || `Simulation failed (${response.status})`);
+    }
     
-    if (prices.length < 2) return 0.1;
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let latest = null;
     
-    // Calculate percentage changes
-    const changes = [];
-    for (let i = 1; i < prices.length; i++) {
-        const change = (prices[i] - prices[i-1]) / prices[i-1];
-        changes.push(change);
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let newline;
+        while ((newline = buffer.indexOf('\n')) !== -1) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (!line) continue;
+            
+            latest = JSON.parse(line);
+            console.log(`📡 Simulation progress: ${latest.paths_done}/${latest.paths_total} paths`);
+            if (onProgress) onProgress(latest);
+        }
     }
+    return latest;
+}
+
+// Simulate next month for several products in one server request
+async function simulateNextMonth(productIds) {
+    const columns = {};
+    const appended = {};
+    productIds.forEach(id => {
+        columns[id] = productColumn(id);
+        appended[columns[id]] = simulatedPrices(id);
+    });
     
-    // Return standard deviation of changes as volatility
-    const mean = changes.reduce((sum, change) => sum + change, 0) / changes.length;
-    const variance = changes.reduce((sum, change) => sum + Math.pow(change - mean, 2), 0) / changes.length;
-    const calculatedVolatility = Math.sqrt(variance);
+    const result = await streamSimulation({
+        products: Object.values(columns),
+        appended: appended,
+        horizon: 1,
+        paths: 2000
+    });
     
-    console.log(`Calculated volatility for ${productId}: ${calculatedVolatility.toFixed(4)} from ${changes.length} data points`);
+    const predictions = {};
+    productIds.forEach(id => {
+        const summary = result.products[columns[id]];
+        window[`interval_${id}`] = { lower: summary.p05[0], upper: summary.p95[0] };
+        // Mean over the drawn trees, i.e. the forest's point forecast as /predict returns it
+        predictions[id] = summary.mean[0];
+    });
+    return predictions;
+}
+
+async function generateNewPrediction(productId, currentPrice) {
+    console.log(`🔮 Generating prediction for: ${productId} from ${currentPrice}`);
     
-    return Math.max(0.02, Math.min(0.5, calculatedVolatility)); // Clamp between 2% and 50%
+    try {
+        const predictions = await simulateNextMonth([productId]);
+        return parseFloat(predictions[productId].toFixed(2));
+    } catch (error) {
+        console.error(`❌ Server simulation failed for ${productId}:`, error);
+        return currentPrice;
+    }
 }
 
 // Better field detection
@@ -352,8 +407,8 @@ function setupDynamicSimulationDate() {
     console.log('🎯 Fallback simulation starts from:', window.simulationDate.toISOString().slice(0, 7));
 }
 
-// Add this function to your dash.js file
-function simulateAllProducts() {
+// Simulate next month for every product with a single server request
+async function simulateAllProducts() {
     console.log("=== STARTING SIMULATION FOR ALL PRODUCTS ===");
     
     if (!window.products || window.products.length === 0) {
@@ -363,15 +418,23 @@ function simulateAllProducts() {
     
     console.log(`🔄 Simulating ${window.products.length} products`);
     
-    // Simulate each product with a delay to avoid conflicts
-    window.products.forEach((productId, index) => {
-        setTimeout(() => {
-            console.log(`🎯 Simulating product: ${productId}`);
-            simulateProduct(productId);
-        }, index * 800); // 800ms delay between each simulation
+    // Advance one month and record the current predictions as actual prices
+    window.simulationDate.setMonth(window.simulationDate.getMonth() + 1);
+    const simulationDateStr = window.simulationDate.toISOString().slice(0, 7);
+    const productIds = window.products.filter(productId => {
+        const price = parseFloat(window[`predicted_${productId}`]);
+        if (isNaN(price)) return false;
+        addToHistoricalData(productId, price, simulationDateStr);
+        return true;
     });
     
-    console.log("✅ All products simulation initiated");
+    try {
+        const predictions = await simulateNextMonth(productIds);
+        productIds.forEach(productId => showSimulatedPrediction(productId, predictions[productId]));
+        console.log("✅ All products simulated");
+    } catch (error) {
+        console.error("❌ Server simulation failed:", error);
+    }
 }
 
 document.addEventListener("DOMContentLoaded", function() {
@@ -0,0 +1,101 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from validation import MAX_JUMP, validate_upload  # noqa: E402
+
+SAMPLES = sorted(glob.glob(os.path.join(BASE_DIR, 'Yearly Data Samples', '*.csv')))
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return pd.read_csv(os.path.join(BASE_DIR, 'data', 'latest.csv'))
+
+
+@pytest.mark.parametrize('sample', SAMPLES, ids=os.path.basename)
+def test_yearly_sample_keeps_closes_of_bars_with_bad_opens(sample, reference):
+    upload = pd.read_csv(sample)
+    clean, report = validate_upload(upload, reference)
+    clean = clean.reindex(upload.index)
+
+    assert report['schema_errors'] == []
+    # Only unreadable dates (2019.csv has a '12/2019') may cost a row
+    assert report['accepted'] == len(upload) - report['rejected']['bad_date']['rows']
+    assert report['cleared']['close_outside_range']['rows'] == 0
+
+    for close_col in [c for c in upload.columns if c.startswith('c_')]:
+        product = close_col[2:]
+        o, h, l, c = (upload[p + product].to_numpy(dtype=float) for p in ('o_', 'h_', 'l_', 'c_'))
+        previous = pd.Series(c).shift(1).to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bad_open = (o < l) | (o > h)
+            good_close = (c > 0) & (l <= c) & (c <= h) & (l <= h)
+            # The first month is compared with the reference, so only later months are checked here
+            no_jump = (c / previous <= MAX_JUMP) & (c / previous >= 1 / MAX_JUMP)
+        keep = bad_open & good_close & no_jump & clean['price_date'].notna().to_numpy()
+
+        np.testing.assert_array_equal(clean[close_col].to_numpy(dtype=float)[keep], c[keep])
+        assert np.isnan(clean['o_' + product].to_numpy(dtype=float)[keep]).all()
+
+
+def test_only_the_out_of_range_field_is_cleared():
+    upload = pd.DataFrame({
+        'price_date': ['2030-01-01', '2030-02-01', '2030-03-01'],
+        'o_rice': [50.0, 40.0, 41.0],   # first open above the high
+        'h_rice': [45.0, 44.0, 30.0],   # third bar has low above high
+        'l_rice': [38.0, 39.0, 35.0],
+        'c_rice': [42.0, 46.0, 40.0],   # second close above the high
+        'c_eggs': [8.0, 8.1, 8.2],      # keeps every row importable
+    })
+    clean, report = validate_upload(upload)
+
+    assert report['accepted'] == 3
+    assert np.isnan(clean.loc[0, 'o_rice']) and clean.loc[0, 'c_rice'] == 42.0
+    assert np.isnan(clean.loc[1, 'c_rice']) and clean.loc[1, 'o_rice'] == 40.0
+    assert clean.loc[2, ['h_rice', 'l_rice']].isna().all() and clean.loc[2, 'c_rice'] == 40.0
+    assert report['cleared']['open_outside_range']['rows'] == 1
+    assert report['cleared']['close_outside_range']['rows'] == 1
+    assert report['cleared']['low_above_high']['rows'] == 1
+
+
+def test_spike_does_not_become_the_baseline():
+    upload = pd.DataFrame({
+        'price_date': ['2030-01-01', '2030-02-01', '2030-03-01'],
+        'c_rice': [40.0, 400.0, 41.0],  # one typo spike, then back to normal
+    })
+    clean, report = validate_upload(upload)
+
+    assert report['accepted'] == 2
+    assert report['rejected']['no_valid_price']['rows'] == 1
+    assert clean['c_rice'].tolist() == [40.0, 41.0]
+
+
+def test_level_shift_confirmed_by_next_month_is_kept():
+    upload = pd.DataFrame({
+        'price_date': ['2030-01-01', '2030-02-01', '2030-03-01'],
+        'c_rice': [4.0, 40.0, 41.0],
+    })
+    clean, report = validate_upload(upload)
+
+    assert clean['c_rice'].tolist() == [4.0, 40.0, 41.0]
+    assert report['cleared']['price_outlier']['rows'] == 0
+
+
+def test_first_month_compared_with_reference_month_before_it():
+    # Reference out of date order, like data/latest.csv (2006-2008, then 2025)
+    reference = pd.DataFrame({
+        'price_date': ['2008-12-01', '2025-01-01', '2008-11-01'],
+        'c_rice': [40.0, 400.0, 39.0],
+    })
+    upload = pd.DataFrame({'price_date': ['2009-01-01'], 'c_rice': [42.0]})
+    clean, report = validate_upload(upload, reference)
+
+    assert report['cleared']['price_outlier']['rows'] == 0
+    assert clean['c_rice'].tolist() == [42.0]
@@ -0,0 +1,195 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+PRICE_PREFIXES = ('o_', 'h_', 'l_', 'c_')
+NUMERIC_PREFIXES = PRICE_PREFIXES + ('inflation_', 'trust_')
+MAX_JUMP = 5.0  # a close more than 5x above/below the previous close is treated as an outlier
+EXAMPLES = 5    # row numbers listed per check in the report
+
+
+def _check(mask, row_numbers):
+    """Compact report entry: how many rows hit a check and the first few row numbers"""
+    hits = np.flatnonzero(mask)
+    return {'rows': int(hits.size), 'examples': row_numbers[hits[:EXAMPLES]].tolist()}
+
+
+def _price_block(numeric, prefix, products):
+    """(n_rows, n_products) array of one price field, NaN where the column is absent"""
+    block = np.full((len(numeric), len(products)), np.nan)
+    for j, product in enumerate(products):
+        col = prefix + product
+        if col in numeric:
+            block[:, j] = numeric[col].to_numpy(dtype=float)
+    return block
+
+
+def _reference_close(reference, products, dates):
+    """Per-product close of the latest reference month before the upload's first month"""
+    last = np.full(len(products), np.nan)
+    if reference is None or not len(reference) or 'price_date' not in reference.columns or dates.isna().all():
+        return last
+
+    ref_dates = pd.to_datetime(reference['price_date'], errors='coerce')
+    before = (ref_dates.dt.to_period('M') < dates.min().to_period('M')).to_numpy()
+    if not before.any():
+        return last
+    # The reference is not necessarily in date order
+    closes = reference.reindex(columns=[f'c_{p}' for p in products])[before]
+    closes = closes.iloc[np.argsort(ref_dates[before].to_numpy(), kind='stable')]
+    return closes.apply(pd.to_numeric, errors='coerce').ffill().iloc[-1].to_numpy(dtype=float)
+
+
+def _jump(a, b):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = a / b
+    return (ratio > MAX_JUMP) | (ratio < 1 / MAX_JUMP)  # NaN compares False
+
+
+def _outliers(c, dates, last):
+    """Closes that jump >5x from the last accepted close and are not confirmed by the next close.
+
+    Walks the rows in date order, so a rejected spike never becomes the
+    baseline of the following month, while a real level shift (the next
+    close agrees with the new level) is accepted.
+    """
+    order = np.argsort(dates.to_numpy(), kind='stable')  # unreadable dates sort last
+    ordered = c[order]
+    following = pd.DataFrame(ordered).bfill().shift(-1).to_numpy()
+
+    outlier = np.zeros(c.shape, dtype=bool)
+    last = last.copy()
+    for i, row in enumerate(order):
+        flagged = _jump(ordered[i], last) & (np.isnan(following[i]) | _jump(ordered[i], following[i]))
+        outlier[row] = flagged
+        accepted = ~flagged & ~np.isnan(ordered[i])
+        last[accepted] = ordered[i][accepted]
+    return outlier
+
+
+def validate_upload(df, reference=None):
+    """Check an uploaded price table before it is merged into the dataset.
+
+    Works column-wise over the whole upload. Rows with an unreadable date,
+    no usable close price or a month repeated later in the file are rejected.
+    Non-numeric and non-positive cells are cleared to NaN, as are an open or
+    close outside its bar's [low, high] and the high/low of a bar whose low
+    exceeds its high. A close more than 5x away from the last accepted close
+    (unless the next close confirms the new level) clears the whole bar.
+    ``reference`` is the existing dataset, used for the schema check and for
+    the close of the month before the upload.
+
+    Returns (clean frame, report); the report has 'schema_errors' when the
+    file cannot be imported at all.
+    """
+    start = time.perf_counter()
+    report = {'rows': int(len(df)), 'schema_errors': [], 'rejected': {}, 'cleared': {}}
+
+    # --- Schema ---
+    products = [c[2:] for c in df.columns if c.startswith('c_')]
+    if 'price_date' not in df.columns:
+        report['schema_errors'].append("missing 'price_date' column")
+    if not products:
+        report['schema_errors'].append("no c_* price columns")
+    if reference is not None:
+        known = set(reference.columns)
+        report['unknown_columns'] = [c for c in df.columns if c not in known]
+        report['missing_columns'] = [c for c in reference.columns if c not in df.columns]
+        if products and not any(f'c_{p}' in known for p in products):
+            report['schema_errors'].append("none of the c_* columns exist in the current dataset")
+    if report['schema_errors']:
+        report['accepted'] = 0
+        report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return df.iloc[0:0], report
+
+    clean = df.copy()
+    row_numbers = np.arange(len(df)) + 2  # CSV line numbers (header is line 1)
+
+    # --- Dtypes: coerce every price-like column at once ---
+    numeric_cols = [c for c in df.columns if c.startswith(NUMERIC_PREFIXES)]
+    raw = df[numeric_cols]
+    numeric = raw.apply(pd.to_numeric, errors='coerce')
+    coerced = (raw.notna() & numeric.isna()).to_numpy()
+    report['cleared']['non_numeric'] = _check(coerced.any(axis=1), row_numbers)
+    clean[numeric_cols] = numeric
+
+    bars = {prefix: _price_block(numeric, prefix, products) for prefix in PRICE_PREFIXES}
+    # Per-field masks of the cells to clear; only the field that is wrong is dropped
+    clear = {prefix: np.zeros(block.shape, dtype=bool) for prefix, block in bars.items()}
+
+    # --- Zero / negative prices ---
+    with np.errstate(invalid='ignore'):
+        for prefix, block in bars.items():
+            clear[prefix] |= block <= 0  # NaN compares False
+    non_positive = np.logical_or.reduce(list(clear.values()))
+    report['cleared']['non_positive_price'] = _check(non_positive.any(axis=1), row_numbers)
+    o, h, l, c = (np.where(clear[p], np.nan, bars[p]) for p in PRICE_PREFIXES)
+
+    # --- o/h/l/c consistency ---
+    with np.errstate(invalid='ignore'):
+        low_above_high = l > h
+        clear['h_'] |= low_above_high
+        clear['l_'] |= low_above_high
+        h = np.where(low_above_high, np.nan, h)
+        l = np.where(low_above_high, np.nan, l)
+        open_outside = (o < l) | (o > h)
+        close_outside = (c < l) | (c > h)
+    clear['o_'] |= open_outside
+    clear['c_'] |= close_outside
+    report['cleared']['low_above_high'] = _check(low_above_high.any(axis=1), row_numbers)
+    report['cleared']['open_outside_range'] = _check(open_outside.any(axis=1), row_numbers)
+    report['cleared']['close_outside_range'] = _check(close_outside.any(axis=1), row_numbers)
+    c = np.where(close_outside, np.nan, c)
+
+    # --- Outliers: jump against the last accepted close ---
+    dates = pd.to_datetime(df['price_date'], errors='coerce')
+    outlier = _outliers(c, dates, _reference_close(reference, products, dates))
+    report['cleared']['price_outlier'] = _check(outlier.any(axis=1), row_numbers)
+
+    # A jump that size is usually a unit or typing error across the whole bar
+    for prefix in PRICE_PREFIXES:
+        clear[prefix] |= outlier
+    for j, product in enumerate(products):
+        for prefix in PRICE_PREFIXES:
+            col = prefix + product
+            if col in clean.columns and clear[prefix][:, j].any():
+                clean.loc[clear[prefix][:, j], col] = np.nan
+    c = np.where(outlier, np.nan, c)
+
+    # --- Row-level rejections ---
+    bad_date = dates.isna().to_numpy()
+    no_price = np.isnan(c).all(axis=1)  # e.g. an all-zero row
+    months = dates.dt.to_period('M')
+    duplicate_month = (months.duplicated(keep='last') & months.notna()).to_numpy()
+
+    report['rejected']['bad_date'] = _check(bad_date, row_numbers)
+    report['rejected']['no_valid_price'] = _check(no_price & ~bad_date, row_numbers)
+    report['rejected']['duplicate_month'] = _check(duplicate_month & ~bad_date & ~no_price, row_numbers)
+
+    rejected = bad_date | no_price | duplicate_month
+    clean = clean[~rejected]
+
+    if reference is not None and 'price_date' in reference.columns:
+        existing = pd.to_datetime(reference['price_date'], errors='coerce').dt.to_period('M')
+        report['replaces_existing_months'] = int(months[~rejected].isin(set(existing.dropna())).sum())
+
+    report['accepted'] = int(len(clean))
+    report['rejected_total'] = int(rejected.sum())
+    report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return clean, report
+
+
+def summarize(report):
+    """One-line description of a validation report for flash messages"""
+    if report['schema_errors']:
+        return "Rejected: " + "; ".join(report['schema_errors'])
+
+    parts = [f"{report['accepted']} of {report['rows']} rows accepted"]
+    rejected = [f"{name.replace('_', ' ')}: {v['rows']}" for name, v in report['rejected'].items() if v['rows']]
+    cleared = [f"{name.replace('_', ' ')}: {v['rows']}" for name, v in report['cleared'].items() if v['rows']]
+    if rejected:
+        parts.append("rejected (" + ", ".join(rejected) + ")")
+    if cleared:
+        parts.append("cells cleared (" + ", ".join(cleared) + ")")
+    return "; ".join(parts)